@@ -0,0 +1,26 @@
+"""add_user_goals_version
+
+Revision ID: 5b9d2e8f4a61
+Revises: c7e5a0f3b218
+Create Date: 2026-10-19 17:05:22.843150
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b9d2e8f4a61'
+down_revision: Union[str, None] = 'c7e5a0f3b218'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('goals_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'goals_version')
@@ -0,0 +1,122 @@
+"""normalize_goal_plan_columns
+
+Revision ID: a4c8e1f7b250
+Revises: e2a7c4f91d36
+Create Date: 2026-10-20 10:02:18.663904
+
+"""
+import json
+from typing import List, Sequence, Union
+
+import orjson
+from alembic import op
+import sqlalchemy as sa
+from pydantic import BaseModel, ValidationError
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c8e1f7b250'
+down_revision: Union[str, None] = 'e2a7c4f91d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_ROWS = 1000
+PLAN_COLUMNS = ("weekly_schedule", "resources", "milestones")
+BACKUP_TABLE = "goal_plan_columns_backup"
+
+
+# Plan item schemas as of this revision, frozen here so replaying it never depends
+# on how app.schema.goal evolves later
+class WeeklyScheduleItem(BaseModel):
+    day: str
+    topics: List[str]
+    duration: str
+
+class ResourceItem(BaseModel):
+    type: str
+    title: str
+    duration: str
+    url: str
+
+class MilestoneItem(BaseModel):
+    week: int
+    goal: str
+    completed: bool = False
+
+PLAN_ITEM_MODELS = {
+    "weekly_schedule": WeeklyScheduleItem,
+    "resources": ResourceItem,
+    "milestones": MilestoneItem,
+}
+
+
+def _load(value):
+    try:
+        return json.loads(value) if value else []
+    except ValueError:
+        return []
+
+
+def _normalize(column: str, items) -> list:
+    """Defaults filled in, unknown keys dropped, items that do not validate skipped"""
+    model = PLAN_ITEM_MODELS[column]
+    valid = []
+    for item in items if isinstance(items, list) else []:
+        try:
+            valid.append(model.model_validate(item).model_dump(mode="json"))
+        except ValidationError:
+            continue
+    return valid
+
+
+def upgrade() -> None:
+    # Plans stored before the orjson read path are raw LLM parser output: rewrite them
+    # through the plan schemas so GET /goals/ can embed the columns as stored.
+    # Original values of rewritten rows are kept in BACKUP_TABLE for downgrade().
+    op.create_table(BACKUP_TABLE,
+        sa.Column('id', sa.UUID(), nullable=False),
+        *[sa.Column(column, sa.Text(), nullable=True) for column in PLAN_COLUMNS],
+        sa.PrimaryKeyConstraint('id')
+    )
+    if op.get_context().as_sql:
+        return
+
+    conn = op.get_bind()
+    select_batch = sa.text(
+        f"SELECT id, {', '.join(PLAN_COLUMNS)} FROM goals "
+        f"WHERE CAST(:after AS uuid) IS NULL OR id > CAST(:after AS uuid) ORDER BY id LIMIT {BATCH_ROWS}"
+    )
+    backup_row = sa.text(
+        f"INSERT INTO {BACKUP_TABLE} (id, {', '.join(PLAN_COLUMNS)}) "
+        f"VALUES (CAST(:id AS uuid), {', '.join(f':{column}' for column in PLAN_COLUMNS)})"
+    )
+    update_row = sa.text(
+        f"UPDATE goals SET {', '.join(f'{column} = :{column}' for column in PLAN_COLUMNS)} WHERE id = CAST(:id AS uuid)"
+    )
+    after, rewritten, dropped = None, 0, 0
+    while True:
+        rows = conn.execute(select_batch, {"after": after}).mappings().all()
+        if not rows:
+            break
+        for row in rows:
+            values = {"id": str(row["id"])}
+            for column in PLAN_COLUMNS:
+                items = _load(row[column])
+                normalized = _normalize(column, items)
+                dropped += len(items) - len(normalized) if isinstance(items, list) else 1
+                values[column] = orjson.dumps(normalized).decode()
+            if any(values[column] != row[column] for column in PLAN_COLUMNS):
+                conn.execute(backup_row, {**row, "id": values["id"]})
+                conn.execute(update_row, values)
+                rewritten += 1
+        after = str(rows[-1]["id"])
+    print(f"Normalized plan columns of {rewritten} goals ({dropped} invalid items dropped, originals in {BACKUP_TABLE})")
+
+
+def downgrade() -> None:
+    # Goals deleted since the upgrade are simply not restored
+    op.execute(
+        f"UPDATE goals g SET {', '.join(f'{column} = b.{column}' for column in PLAN_COLUMNS)} "
+        f"FROM {BACKUP_TABLE} b WHERE b.id = g.id"
+    )
+    op.drop_table(BACKUP_TABLE)
@@ -0,0 +1,28 @@
+"""add_idempotency_key_lease
+
+Revision ID: b81f3d6c9e27
+Revises: a4c8e1f7b250
+Create Date: 2026-10-20 14:21:09.518337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f3d6c9e27'
+down_revision: Union[str, None] = 'a4c8e1f7b250'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('idempotency_keys', sa.Column('owner_token', sa.String(length=36), nullable=True))
+    op.add_column('idempotency_keys', sa.Column('locked_until', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('idempotency_keys', 'locked_until')
+    op.drop_column('idempotency_keys', 'owner_token')
@@ -0,0 +1,71 @@
+"""add_foreign_key_indexes
+
+Revision ID: c7e5a0f3b218
+Revises: 8d41e6b2c953
+Create Date: 2026-10-19 15:32:54.117306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e5a0f3b218'
+down_revision: Union[str, None] = '8d41e6b2c953'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Every FK that list queries filter on or that ON DELETE CASCADE has to search
+FOREIGN_KEY_INDEXES = [
+    ('goals', 'user_id'),
+    ('tasks', 'goal_id'),
+    ('tasks', 'user_id'),
+    ('resources', 'task_id'),
+    ('summaries', 'user_id'),
+    ('summaries', 'goal_id'),
+    ('summaries', 'task_id'),
+    ('progress', 'user_id'),
+    ('progress', 'goal_id'),
+    ('notifications', 'user_id'),
+    ('notifications', 'task_id'),
+    ('notifications', 'goal_id'),
+]
+
+
+def _index_state(name: str):
+    """None if the index does not exist, else whether it is valid"""
+    if op.get_context().as_sql:
+        # Offline (--sql) scripts cannot inspect the catalog; they create every index
+        return None
+    return op.get_bind().execute(
+        sa.text("SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"),
+        {"name": name},
+    ).scalar()
+
+
+def _create_index_concurrently(name: str, table: str, columns: list) -> None:
+    valid = _index_state(name)
+    if valid:
+        return
+    if valid is False:
+        # A failed CONCURRENTLY build leaves an INVALID index behind under the same name
+        op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for table, column in FOREIGN_KEY_INDEXES:
+            _create_index_concurrently(f'ix_{table}_{column}', table, [column])
+        # Case-insensitive email lookups (login / signup)
+        _create_index_concurrently('ix_users_email_lower', 'users', [sa.text('lower(email)')])
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_email_lower', table_name='users', postgresql_concurrently=True, if_exists=True)
+        for table, column in reversed(FOREIGN_KEY_INDEXES):
+            op.drop_index(f'ix_{table}_{column}', table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,26 @@
+"""index_rate_limit_buckets_updated_at
+
+Revision ID: d5e9a2b7c413
+Revises: b81f3d6c9e27
+Create Date: 2026-10-20 15:48:52.107364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e9a2b7c413'
+down_revision: Union[str, None] = 'b81f3d6c9e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_rate_limit_buckets_updated_at'), 'rate_limit_buckets', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_rate_limit_buckets_updated_at'), table_name='rate_limit_buckets')
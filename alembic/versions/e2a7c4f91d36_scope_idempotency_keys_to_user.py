@@ -0,0 +1,37 @@
+"""scope_idempotency_keys_to_user
+
+Revision ID: e2a7c4f91d36
+Revises: 5b9d2e8f4a61
+Create Date: 2026-10-20 09:14:37.205118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a7c4f91d36'
+down_revision: Union[str, None] = '5b9d2e8f4a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keys without an owner cannot be scoped; they are short-lived replay records
+    op.execute("DELETE FROM idempotency_keys WHERE user_id IS NULL")
+    op.drop_constraint('idempotency_keys_pkey', 'idempotency_keys', type_='primary')
+    op.alter_column('idempotency_keys', 'user_id', existing_type=sa.String(length=64), nullable=False)
+    op.create_primary_key('idempotency_keys_pkey', 'idempotency_keys', ['user_id', 'key'])
+
+
+def downgrade() -> None:
+    # Several users may hold the same key; keep the oldest before restoring global uniqueness
+    op.execute(
+        "DELETE FROM idempotency_keys a USING idempotency_keys b "
+        "WHERE a.key = b.key AND (a.created_at, a.user_id) > (b.created_at, b.user_id)"
+    )
+    op.drop_constraint('idempotency_keys_pkey', 'idempotency_keys', type_='primary')
+    op.alter_column('idempotency_keys', 'user_id', existing_type=sa.String(length=64), nullable=True)
+    op.create_primary_key('idempotency_keys_pkey', 'idempotency_keys', ['key'])
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+import secrets
+import uuid
+
+from app.core.config import settings
+from app.services.goal_transfer import export_goals, import_goals
+
+def require_admin(x_admin_key: Optional[str] = Header(None)):
+    # Admin endpoints stay disabled until ADMIN_API_KEY is configured
+    if not settings.ADMIN_API_KEY or not x_admin_key or not secrets.compare_digest(x_admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(status_code=403, detail="Admin key required")
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/goals/export")
+async def export_goals_ndjson(user_id: Optional[List[uuid.UUID]] = Query(None)):
+    """📦 Stream goals with plans, tasks and progress as zstd-compressed NDJSON"""
+    return StreamingResponse(
+        export_goals(user_id),
+        media_type="application/zstd",
+        headers={"Content-Disposition": 'attachment; filename="goals.ndjson.zst"'},
+    )
+
+@router.post("/goals/import")
+async def import_goals_ndjson(request: Request, on_conflict: str = Query("skip", pattern="^(skip|update)$")):
+    """📥 Bulk-load a goals export (request body: zstd NDJSON) with COPY.
+
+    Batches commit independently; on failure the error detail lists what was already committed.
+    """
+    return await import_goals(request.stream(), on_conflict)
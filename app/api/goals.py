@@ -1,28 +1,49 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Header, Request
+from typing import List, Optional
 import uuid
 from datetime import date, datetime
 import json
 
 from app.db.database import database, engine
 from app.db import models
-from app.schema.goal import Goal, GoalCreate, AIPlanRequest, LearningPlan
+from app.schema.goal import (
+    Goal, GoalCreate, AIPlanRequest, LearningPlan, PlanRegenerateRequest, RegenerateScope
+)
 from sqlalchemy import insert, select, update, delete
 
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from app.core.config import settings
+from app.services.admission import llm_admission, client_key, user_key
+from app.services.model_router import request_features, routing_stats, run_routed_chain
+from app.services.idempotency import idempotent_response
+from app.services.plan_regeneration import build_section_request, check_section, merge_section, missing_weeks, week_of
+from app.services.http_cache import make_etag, matching_etag, not_modified, conditional_response
+from app.services.serialization import PLAN_COLUMNS, dump_plan_column, encode_goal, encode_goals, json_response
 
 router = APIRouter()
 
-# ✅ AI LLM Setup
-llm = ChatOpenAI(model="gpt-3.5-turbo", api_key=settings.OPENAI_API_KEY, temperature=0.7)
-output_parser = JsonOutputParser(pydantic_object=LearningPlan)
+async def bump_goals_version(conn, user_id):
+    """Invalidate ETags of the user's goal list; call inside the transaction that writes goals"""
+    await conn.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(goals_version=models.User.goals_version + 1)
+    )
 
 @router.post("/", response_model=Goal)
-async def create_goal(goal: GoalCreate):
-    """Create a new goal with AI-generated learning plan"""
+async def create_goal(goal: GoalCreate, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    """Create a new goal with AI-generated learning plan.
+
+    Retries sent with the same Idempotency-Key get the stored response back
+    instead of generating (and paying for) the plan again.
+    """
+    if not idempotency_key:
+        return json_response(await save_goal_with_plan(goal))
+    return await idempotent_response(
+        idempotency_key, goal.user_id, goal.model_dump(mode="json"),
+        lambda: save_goal_with_plan(goal)
+    )
+
+async def save_goal_with_plan(goal: GoalCreate) -> bytes:
+    """Generate the AI plan, store the goal and return the encoded Goal"""
     # Check if user exists
     user_query = select(models.User).where(models.User.id == goal.user_id)
     user = await database.fetch_one(user_query)
@@ -31,64 +52,61 @@ async def create_goal(goal: GoalCreate):
 
     duration_days = int(goal.duration_days)
 
-    # Generate AI plan
-    ai_plan = await generate_ai_plan_openai(
-        goal.title, goal.description, duration_days, 
-        goal.start_date, goal.end_date, goal.difficulty,
-        goal.study_schedule, goal.weekly_hours, goal.learning_style
-    )
+    # Generate AI plan (quota per verified user)
+    async with llm_admission.admit(user_key(user["id"])):
+        ai_plan = await generate_ai_plan_openai(
+            goal.title, goal.description, duration_days, 
+            goal.start_date, goal.end_date, goal.difficulty,
+            goal.study_schedule, goal.weekly_hours, goal.learning_style
+        )
+
+    # The only validation of the plan: stored columns are canonical JSON from here on
+    plan = LearningPlan.model_validate(ai_plan).model_dump(mode="json")
 
-    goal_id = uuid.uuid4()
-    created_at = datetime.utcnow()
+    saved = {
+        "id": uuid.uuid4(),
+        "title": goal.title,
+        "description": goal.description,
+        "duration_days": duration_days,
+        "start_date": goal.start_date,
+        "end_date": goal.end_date,
+        "created_at": datetime.utcnow(),
+        "difficulty": goal.difficulty,
+        "study_schedule": goal.study_schedule,
+        "weekly_hours": goal.weekly_hours,
+        "learning_style": goal.learning_style,
+        "weekly_schedule": dump_plan_column(plan["weekly_schedule"]),
+        "resources": dump_plan_column(plan["resources"]),
+        "milestones": dump_plan_column(plan["milestones"]),
+        "progress": 0.0,
+        "completed": False,
+        "user_id": goal.user_id
+    }
 
     async with engine.begin() as conn:
-        await conn.execute(
-            insert(models.Goal),
-            {
-                "id": goal_id,
-                "title": goal.title,
-                "description": goal.description,
-                "duration_days": duration_days,
-                "start_date": goal.start_date,
-                "end_date": goal.end_date,
-                "created_at": created_at,
-                "difficulty": goal.difficulty,
-                "study_schedule": goal.study_schedule,
-                "weekly_hours": goal.weekly_hours,
-                "learning_style": goal.learning_style,
-                "weekly_schedule": json.dumps(ai_plan["weekly_schedule"]),
-                "resources": json.dumps(ai_plan["resources"]),
-                "milestones": json.dumps(ai_plan["milestones"]),
-                "progress": 0.0,
-                "completed": False,
-                "user_id": goal.user_id
-            }
-        )
+        await conn.execute(insert(models.Goal), saved)
+        await bump_goals_version(conn, goal.user_id)
 
     # RETURN SAVED GOAL
-    return Goal(
-        id=goal_id,
-        title=goal.title,
-        description=goal.description,
-        duration_days=duration_days,
-        start_date=goal.start_date,
-        end_date=goal.end_date,
-        created_at=created_at,
-        difficulty=goal.difficulty,
-        study_schedule=goal.study_schedule,
-        weekly_hours=goal.weekly_hours,
-        learning_style=goal.learning_style,
-        weekly_schedule=ai_plan["weekly_schedule"],
-        resources=ai_plan["resources"],
-        milestones=ai_plan["milestones"],
-        progress=0.0,
-        completed=False,
-        user_id=goal.user_id
-    )
+    return encode_goal(saved)
 
 @router.get("/", response_model=List[Goal])
-async def read_goals(user_id: str, q: str = None):
-    """Get all goals for a user, with optional search."""
+async def read_goals(
+    user_id: str, q: str = None,
+    if_none_match: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None)
+):
+    """Get all goals for a user, with optional search.
+
+    The ETag comes from the user's goals_version, so a revalidation that still
+    matches is answered with 304 before any goal is loaded or serialized.
+    """
+    # Read the version before the rows: a concurrent write can then only make the ETag stale, never too new
+    version = await database.fetch_val(select(models.User.goals_version).where(models.User.id == user_id))
+    etag = make_etag("goals", user_id, version, q or "")
+    matched = matching_etag(if_none_match, etag)
+    if matched:
+        return not_modified(matched)
+
     query = select(models.Goal).where(models.Goal.user_id == user_id)
     
     if q:
@@ -96,66 +114,93 @@ async def read_goals(user_id: str, q: str = None):
     
     rows = await database.fetch_all(query)
     
-    goals = []
-    for row in rows:
-        goal_data = dict(row)
-        goal_data["weekly_schedule"] = json.loads(row.weekly_schedule) if row.weekly_schedule else []
-        goal_data["resources"] = json.loads(row.resources) if row.resources else []
-        goal_data["milestones"] = json.loads(row.milestones) if row.milestones else []
-        goals.append(Goal(**{**goal_data, "user_id": str(goal_data["user_id"])}))
-    
-    return goals
+    return conditional_response(encode_goals(rows), etag, accept_encoding)
+
+def plan_from_row(row) -> dict:
+    """Decode the JSON plan columns of a goals row"""
+    return {column: json.loads(row[column]) if row[column] else [] for column in PLAN_COLUMNS}
 
 @router.post("/ai-plan", response_model=LearningPlan)
-async def generate_ai_plan(request: AIPlanRequest):
+async def generate_ai_plan(request: AIPlanRequest, http_request: Request):
     """🤖 Generate AI Learning Plan (Step 3 Preview)"""
-    try:
-        # Try OpenAI first
-        ai_plan = await generate_ai_plan_openai(
-            request.title, request.description, request.duration_days,
-            None, None, request.difficulty, request.study_schedule,
-            request.weekly_hours, request.learning_style
-        )
-        return ai_plan
-    except Exception as e:
-        print(f"OpenAI Error: {e}")
-        return get_fallback_plan(request.title, request.weekly_hours, request.duration_days)
+    # Admission errors (429/503) must reach the client, not the fallback plan
+    async with llm_admission.admit(client_key(http_request)):
+        try:
+            # Try OpenAI first
+            ai_plan = await generate_ai_plan_openai(
+                request.title, request.description, request.duration_days,
+                None, None, request.difficulty, request.study_schedule,
+                request.weekly_hours, request.learning_style
+            )
+            return ai_plan
+        except Exception as e:
+            print(f"OpenAI Error: {e}")
+            return get_fallback_plan(request.title, request.weekly_hours, request.duration_days)
+
+@router.get("/ai-plan/routing-stats")
+async def get_routing_stats():
+    """📊 Per-tier latency and parse-failure rates for tuning routing rules"""
+    return routing_stats()
+
+@router.post("/{goal_id}/plan/regenerate", response_model=Goal)
+async def regenerate_plan_section(goal_id: uuid.UUID, request: PlanRegenerateRequest):
+    """🔁 Rebuild one section of a stored plan (a week range, resources or milestones)"""
+    goal_table = models.Goal.__table__
+    row = await database.fetch_one(select(goal_table).where(goal_table.c.id == goal_id))
+    if not row:
+        raise HTTPException(status_code=404, detail="Goal not found")
+
+    week_start = week_end = None
+    if request.scope == RegenerateScope.weeks:
+        if request.week_start is None:
+            raise HTTPException(status_code=422, detail="week_start is required for scope 'weeks'")
+        week_start = request.week_start
+        week_end = request.week_end or week_start
+        if week_end < week_start:
+            raise HTTPException(status_code=422, detail="week_end must not be before week_start")
+        if not any(week_of(item) for item in plan_from_row(row)["weekly_schedule"]):
+            raise HTTPException(status_code=422, detail="This plan's schedule has no week labels; regenerate the full plan instead")
+        missing = missing_weeks(plan_from_row(row)["weekly_schedule"], week_start, week_end)
+        if missing:
+            raise HTTPException(status_code=422, detail=f"Week(s) {', '.join(map(str, missing))} are not in this plan")
+
+    # Only the edited slice plus a compact summary goes to the LLM
+    section_request = build_section_request(plan_from_row(row), request.scope, week_start, week_end)
+    async with llm_admission.admit(user_key(row["user_id"])):
+        features = request_features(row["duration_days"], row["difficulty"], row["description"])
+        section = await run_routed_chain(f"plan_{request.scope.value}", {
+            "title": row["title"],
+            "duration_days": row["duration_days"],
+            "difficulty": row["difficulty"],
+            "weekly_hours": row["weekly_hours"],
+            "learning_style": row["learning_style"],
+            "instructions": request.instructions or "Improve this section.",
+            **section_request
+        }, features)
+
+    check_section(request.scope, section, week_start, week_end)
+
+    # Merge into the latest stored plan under a row lock so concurrent edits are not lost
+    async with engine.begin() as conn:
+        result = await conn.execute(select(goal_table).where(goal_table.c.id == goal_id).with_for_update())
+        current = result.mappings().first()
+        if current is None:
+            raise HTTPException(status_code=404, detail="Goal not found")
+        merged = merge_section(plan_from_row(current), request.scope, section, week_start, week_end)
+        stored = {column: dump_plan_column(merged[column]) for column in PLAN_COLUMNS}
+        await conn.execute(update(goal_table).where(goal_table.c.id == goal_id).values(stored))
+        await bump_goals_version(conn, current["user_id"])
+
+    return json_response(encode_goal({**current, **stored}))
 
 async def generate_ai_plan_openai(title, description, duration_days, start_date, end_date, difficulty, study_schedule, weekly_hours, learning_style):
     """Generate AI plan using OpenAI"""
-    prompt = PromptTemplate(
-        template="""You are an expert learning plan generator. Create a detailed, personalized learning plan.
-
-Learning Goal: {title}
-Description: {description}
-Duration: {duration_days} days
-Start Date: {start_date}
-End Date: {end_date}
-Difficulty Level: {difficulty}
-Study Schedule: {study_schedule}
-Weekly Hours Available: {weekly_hours}
-Preferred Learning Style: {learning_style}
-
-Generate a comprehensive learning plan with:
-1. A weekly schedule with specific days, topics, and durations
-2. Curated learning resources (courses, videos, books, articles) with real URLs when possible
-3. Progressive milestones to track learning progress
-
-{format_instructions}
-
-Provide ONLY valid JSON output. No additional text or explanations.""",
-        input_variables=["title", "description", "duration_days", "start_date", "end_date", 
-                        "difficulty", "study_schedule", "weekly_hours", "learning_style"],
-        partial_variables={"format_instructions": output_parser.get_format_instructions()}
-    )
-    
-    chain = prompt | llm | output_parser
-    
     # ✅ PERFECT FIX: Handle Optional dates
     start_date_str = start_date.strftime("%Y-%m-%d") if start_date else "TBD"
     end_date_str = end_date.strftime("%Y-%m-%d") if end_date else "TBD"
     
-    result = await chain.ainvoke({
+    features = request_features(duration_days, difficulty, description)
+    return await run_routed_chain("learning_plan", {
         "title": title,
         "description": description,
         "duration_days": duration_days,
@@ -165,8 +210,7 @@ Provide ONLY valid JSON output. No additional text or explanations.""",
         "study_schedule": study_schedule,
         "weekly_hours": weekly_hours,
         "learning_style": learning_style
-    })
-    return result
+    }, features)
 
 def get_fallback_plan(title, weekly_hours, duration_days):
     """Fallback plan if OpenAI fails"""
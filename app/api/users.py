@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from typing import List
 import uuid
-from sqlalchemy import insert, select, update, delete
+from sqlalchemy import insert, select, update, delete, func
 from passlib.context import CryptContext
 
 # ✅ STABLE PASSWORD HASHING
@@ -18,7 +18,7 @@ async def create_user(user: UserCreate):
     normalized_email = user.email.lower()
     
     # Check if user exists
-    query = select(models.User).where(models.User.email.ilike(normalized_email))
+    query = select(models.User).where(func.lower(models.User.email) == normalized_email)
     existing_user = await database.fetch_one(query)
     
     if existing_user:
@@ -91,7 +91,7 @@ async def delete_user(user_id: uuid.UUID):
 @router.post("/login", response_model=User)
 async def login_user(request: LoginRequest):
     normalized_email = request.email.lower()
-    query = select(models.User).where(models.User.email.ilike(normalized_email))
+    query = select(models.User).where(func.lower(models.User.email) == normalized_email)
     user = await database.fetch_one(query)
 
     if not user:
@@ -1,10 +1,58 @@
+import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
     OPENAI_API_KEY: str
+
+    # AI plan prompt version (see app/services/ai_plan.py PROMPTS)
+    AI_PLAN_PROMPT_VERSION: str = "v3"
+
+    # LLM backend tiers (JSON in .env). Each tier: model, and optionally base_url
+    # (local OpenAI-compatible server), api_key, temperature, structured_method
+    LLM_TIERS: dict = {
+        "fast": {"model": "gpt-3.5-turbo"},
+        "quality": {"model": "gpt-4o"},
+    }
+    LLM_DEFAULT_TIER: str = "fast"
+    # First matching rule wins; a rule matches when all of its conditions hold.
+    # Empty by default: every request uses LLM_DEFAULT_TIER until rules are opted into, e.g.
+    # [{"tier": "quality", "min_duration_days": 90}, {"tier": "quality", "difficulty": ["advanced"]}]
+    LLM_ROUTING_RULES: list = []
+    LLM_SHADOW_TIER: Optional[str] = None    # also run a sample of requests on this tier and compare
+    LLM_SHADOW_SAMPLE_RATE: float = 0.1
+
+    # Response compression (gzip / zstd) for large JSON payloads
+    COMPRESSION_MIN_BYTES: int = 1024
+    GZIP_LEVEL: int = 6
+    ZSTD_LEVEL: int = 3
+
+    # React production build served on the API origin (skipped if the folder is missing)
+    SERVE_FRONTEND: bool = True
+    FRONTEND_BUILD_DIR: str = os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "build")
+
+    # Admin endpoints (bulk export / import) are disabled unless this is set
+    ADMIN_API_KEY: Optional[str] = None
+
+    # Idempotency-Key handling for POST /goals/
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    IDEMPOTENCY_WAIT_TIMEOUT_SECONDS: float = 120.0
+    IDEMPOTENCY_LEASE_SECONDS: float = 30.0     # in_progress keys not renewed for this long are taken over
+    IDEMPOTENCY_POLL_INTERVAL_SECONDS: float = 0.5
+    IDEMPOTENCY_SWEEP_INTERVAL_SECONDS: float = 3600.0
+
+    # Admission control for LLM-backed endpoints
+    ADMISSION_STORE: str = "memory"          # memory (per worker) / postgres (shared)
+    LLM_USER_RATE_PER_MINUTE: float = 6.0
+    LLM_USER_BURST: int = 3
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_MAX_QUEUE: int = 32
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 30.0
+    LLM_RETRY_AFTER_SECONDS: int = 5
+    ADMISSION_SWEEP_INTERVAL_SECONDS: float = 600.0
     
     class Config:
         env_file = ".env"
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime, date
 from sqlalchemy import (
     Column, String, Text, DateTime, Date, Enum, ForeignKey,
-    Integer, Boolean, Float, UniqueConstraint
+    Integer, Boolean, Float, UniqueConstraint, Index, func
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -16,6 +16,11 @@ class User(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     email = Column(String(150), unique=True, nullable=False)
     password = Column(String(150), nullable=False)
+    goals_version = Column(Integer, nullable=False, default=0, server_default="0")   # bumped on every goal write (ETags)
+
+    __table_args__ = (
+        Index("ix_users_email_lower", func.lower(email)),   # case-insensitive login lookups
+    )
 
     goals = relationship("Goal", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
     tasks = relationship("Task", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
@@ -45,7 +50,7 @@ class Goal(Base):
     progress = Column(Float, default=0.0)
     completed = Column(Boolean, default=False)
 
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), index=True)
     user = relationship("User", back_populates="goals")
 
     tasks = relationship("Task", back_populates="goal", cascade="all, delete-orphan", passive_deletes=True)
@@ -72,10 +77,10 @@ class Task(Base):
     due_date = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id", ondelete="CASCADE"))
+    goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id", ondelete="CASCADE"), index=True)
     goal = relationship("Goal", back_populates="tasks")
 
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), index=True)
     user = relationship("User", back_populates="tasks")
 
     resources = relationship("Resource", back_populates="task", cascade="all, delete-orphan", passive_deletes=True)
@@ -92,7 +97,7 @@ class Resource(Base):
     resource_type = Column(String(50), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id", ondelete="CASCADE"))
+    task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id", ondelete="CASCADE"), index=True)
     task = relationship("Task", back_populates="resources")
 
 class Summary(Base):
@@ -103,13 +108,13 @@ class Summary(Base):
     description = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), index=True)
     user = relationship("User", back_populates="summaries")
 
-    goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id", ondelete="CASCADE"))
+    goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id", ondelete="CASCADE"), index=True)
     goal = relationship("Goal", back_populates="summaries")
 
-    task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id", ondelete="CASCADE"))
+    task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id", ondelete="CASCADE"), index=True)
     task = relationship("Task", back_populates="summaries")
 
     embedding = Column(Vector(768), nullable=True)
@@ -122,10 +127,10 @@ class Progress(Base):
     task_progress = Column(Float, default=0.0)
     last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), index=True)
     user = relationship("User", back_populates="progress_records")
 
-    goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id", ondelete="CASCADE"))
+    goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id", ondelete="CASCADE"), index=True)
     goal = relationship("Goal", back_populates="progress")
 
 class Notification(Base):
@@ -137,11 +142,33 @@ class Notification(Base):
     notification_type = Column(String(50), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), index=True)
     user = relationship("User", back_populates="notifications")
 
-    task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id", ondelete="CASCADE"), nullable=True)
-    goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id", ondelete="CASCADE"), nullable=True)
+    task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id", ondelete="CASCADE"), nullable=True, index=True)
+    goal_id = Column(UUID(as_uuid=True), ForeignKey("goals.id", ondelete="CASCADE"), nullable=True, index=True)
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    # Keys are chosen by clients, so they are only unique per user
+    user_id = Column(String(64), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    request_fingerprint = Column(String(64), nullable=False)   # sha256 of the request body
+    status = Column(String(20), nullable=False, default="in_progress")  # in_progress / completed
+    owner_token = Column(String(36), nullable=True)            # request currently holding the key
+    locked_until = Column(DateTime, nullable=True)             # lease, renewed while the owner runs
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)                # exact bytes returned to the client
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String(255), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
 
 
 # class TaskType(PyEnum):
@@ -1,9 +1,16 @@
+import asyncio
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import users, goals, auth
+from fastapi.responses import ORJSONResponse
+from app.api import users, goals, auth, admin
+from app.core.config import settings
 from app.db.database import database
+from app.services.admission import sweep_buckets_forever
+from app.services.frontend_assets import FrontendAssets, FrontendMiddleware
+from app.services.idempotency import sweep_expired_keys_forever
 
-app = FastAPI(title="Goal Pilot AI", version="1.0.0")
+app = FastAPI(title="Goal Pilot AI", version="1.0.0", default_response_class=ORJSONResponse)
 
 # ✅ FIXED CORS - SPECIFIC ORIGINS
 app.add_middleware(
@@ -17,13 +24,26 @@ app.add_middleware(
 app.include_router(users.router, prefix="/users", tags=["users"])
 app.include_router(goals.router, prefix="/goals", tags=["goals"])
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
+app.include_router(admin.router, prefix="/admin", tags=["admin"])
+
+# ✅ REACT BUILD ON THE SAME ORIGIN (API routes take precedence)
+if settings.SERVE_FRONTEND and os.path.isdir(settings.FRONTEND_BUILD_DIR):
+    app.add_middleware(
+        FrontendMiddleware,
+        assets=FrontendAssets(settings.FRONTEND_BUILD_DIR, settings.COMPRESSION_MIN_BYTES),
+        router=app.router,
+    )
 
 @app.on_event("startup")
 async def startup():
     await database.connect()
+    app.state.idempotency_sweeper = asyncio.create_task(sweep_expired_keys_forever())
+    app.state.bucket_sweeper = asyncio.create_task(sweep_buckets_forever())
 
 @app.on_event("shutdown")
 async def shutdown():
+    app.state.idempotency_sweeper.cancel()
+    app.state.bucket_sweeper.cancel()
     await database.disconnect()
 
 @app.get("/")
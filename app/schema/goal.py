@@ -42,6 +42,27 @@ class LearningPlan(BaseModel):
     resources: List[ResourceItem]
     milestones: List[MilestoneItem]
 
+# ✅ PARTIAL PLAN REGENERATION
+class WeeklyScheduleSlice(BaseModel):
+    weekly_schedule: List[WeeklyScheduleItem]
+
+class ResourcesSlice(BaseModel):
+    resources: List[ResourceItem]
+
+class MilestonesSlice(BaseModel):
+    milestones: List[MilestoneItem]
+
+class RegenerateScope(str, Enum):
+    weeks = "weeks"
+    resources = "resources"
+    milestones = "milestones"
+
+class PlanRegenerateRequest(BaseModel):
+    scope: RegenerateScope
+    week_start: Optional[int] = Field(default=None, ge=1, description="First week to rebuild (scope=weeks)")
+    week_end: Optional[int] = Field(default=None, ge=1, description="Last week to rebuild, defaults to week_start")
+    instructions: Optional[str] = Field(default=None, max_length=500)
+
 class AIPlanRequest(BaseModel):
     title: str
     description: str
@@ -0,0 +1,47 @@
+import json
+
+import tiktoken
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from app.services.ai_plan import PROMPTS, build_prompt
+
+SAMPLE_REQUEST = {
+    "title": "Learn React Fundamentals",
+    "description": "Master React components, hooks, and state management",
+    "duration_days": 60,
+    "start_date": "2025-11-01",
+    "end_date": "2025-12-31",
+    "difficulty": "beginner",
+    "study_schedule": "regular",
+    "weekly_hours": "5",
+    "learning_style": "hands-on",
+}
+
+def count_prompt_tokens(name, version, spec, encoding):
+    prompt_tokens = len(encoding.encode(build_prompt(name, version).format(**SAMPLE_REQUEST)))
+    # Structured mode ships the schema as a tool definition instead of prompt text
+    schema_tokens = 0
+    if spec["mode"] == "structured":
+        tool = convert_to_openai_tool(spec["schema"])
+        schema_tokens = len(encoding.encode(json.dumps(tool, separators=(",", ":"))))
+    return prompt_tokens, schema_tokens
+
+def run_benchmark(model="gpt-3.5-turbo"):
+    encoding = tiktoken.encoding_for_model(model)
+
+    name = "learning_plan"
+    versions = PROMPTS[name]
+    print(f"Prompt: {name}")
+    baseline = None
+    for version, spec in versions.items():
+        prompt_tokens, schema_tokens = count_prompt_tokens(name, version, spec, encoding)
+        total = prompt_tokens + schema_tokens
+        baseline = baseline or total
+        saved = baseline - total
+        print(
+            f"  {version} ({spec['mode']}): prompt={prompt_tokens} tool_schema={schema_tokens} "
+            f"total={total} saved_vs_{next(iter(versions))}={saved} ({saved / baseline:.0%})"
+        )
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,94 @@
+import json
+import time
+import uuid
+from datetime import date, datetime
+from typing import List
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.schema.goal import Goal
+from app.services.serialization import PLAN_COLUMNS, dump_plan_column, goal_document
+
+SIZES = (1, 100, 10000)
+DAYS = ("Monday", "Wednesday", "Friday")
+
+
+def sample_row(i: int) -> dict:
+    """A goals row with a realistic 12-week plan, plan columns stored as JSON text"""
+    weekly_schedule = [
+        {"day": f"Week {week} - {day}", "topics": [f"Topic {week}.{n}" for n in range(3)], "duration": "2h"}
+        for week in range(1, 13) for day in DAYS
+    ]
+    resources = [
+        {"type": "Video", "title": f"Resource {n}", "duration": "1h", "url": f"https://example.com/resource/{n}"}
+        for n in range(10)
+    ]
+    milestones = [{"week": week, "goal": f"Milestone for week {week}", "completed": False} for week in range(1, 13)]
+    return {
+        "id": uuid.uuid4(),
+        "title": f"Learn React Fundamentals {i}",
+        "description": "Master React components, hooks, and state management",
+        "duration_days": 84,
+        "start_date": date(2025, 11, 1),
+        "end_date": date(2026, 1, 24),
+        "created_at": datetime(2025, 10, 21, 19, 0, 55, 380691),
+        "difficulty": "beginner",
+        "study_schedule": "regular",
+        "weekly_hours": "6",
+        "learning_style": "hands-on",
+        "weekly_schedule": dump_plan_column(weekly_schedule),
+        "resources": dump_plan_column(resources),
+        "milestones": dump_plan_column(milestones),
+        "progress": 0.0,
+        "completed": False,
+        "user_id": uuid.UUID(int=1),
+    }
+
+
+goal_list_adapter = TypeAdapter(List[Goal])
+
+
+def encode_previous(rows) -> bytes:
+    """Old path: Goal(**row) per row, then response_model re-validation and json.dumps"""
+    goals = []
+    for row in rows:
+        goal_data = dict(row)
+        for column in PLAN_COLUMNS:
+            goal_data[column] = json.loads(row[column]) if row[column] else []
+        goals.append(Goal(**{**goal_data, "user_id": str(goal_data["user_id"])}))
+    # What FastAPI does with response_model=List[Goal]
+    content = [goal.model_dump() for goal in goals]
+    jsonable = goal_list_adapter.dump_python(goal_list_adapter.validate_python(content), mode="json")
+    return json.dumps(jsonable, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def encode_fast(rows) -> bytes:
+    return orjson.dumps([goal_document(row) for row in rows])
+
+
+def best_of(fn, rows, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run_benchmark():
+    for size in SIZES:
+        rows = [sample_row(i) for i in range(size)]
+        assert json.loads(encode_previous(rows)) == json.loads(encode_fast(rows)), "payloads differ"
+
+        repeat = 3 if size >= 10000 else 20
+        previous = best_of(encode_previous, rows, repeat)
+        fast = best_of(encode_fast, rows, repeat)
+        print(
+            f"{size:>6} goals: previous={previous * 1000:9.2f} ms  fast={fast * 1000:9.2f} ms  "
+            f"speedup={previous / fast:5.1f}x  payload={len(encode_fast(rows)) / 1024:,.0f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    run_benchmark()
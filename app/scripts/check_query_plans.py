@@ -0,0 +1,192 @@
+"""Query-plan regression check for the queries issued by app/api/*.
+
+Seeds a realistic data volume inside a transaction, runs EXPLAIN on every hot
+query (plus the child-table deletes that ON DELETE CASCADE performs for
+delete_user) and exits non-zero when one of them falls back to a sequential
+scan. Everything is rolled back afterwards, so it is safe to run against a
+development database:
+
+    python -m app.scripts.check_query_plans [--users 5000]
+"""
+import argparse
+import sys
+from datetime import datetime
+
+from sqlalchemy import create_engine, delete, func, or_, select, text, update
+
+from app.core.config import settings
+from app.db import models
+from app.services.goal_transfer import (
+    BUMP_VERSIONS_SQL, EXPORT_SQL, GOAL_COLUMNS, IMPORT_BATCH_ROWS, STAGING_TABLE, merge_statements,
+)
+
+SEED_SQL = [
+    """INSERT INTO users (id, email, password)
+       SELECT gen_random_uuid(), 'plancheck-' || i || '@example.com', 'x'
+       FROM generate_series(1, :users) i""",
+    """INSERT INTO goals (id, title, description, duration_days, created_at, difficulty, weekly_schedule,
+                          resources, milestones, completed, user_id)
+       SELECT gen_random_uuid(), 'Goal ' || g, 'Seeded goal', 30, now(), 'beginner', '[]', '[]', '[]', false, u.id
+       FROM users u CROSS JOIN generate_series(1, :goals_per_user) g
+       WHERE u.email LIKE 'plancheck-%'""",
+    """INSERT INTO tasks (id, title, task_type, status, created_at, goal_id, user_id)
+       SELECT gen_random_uuid(), 'Task ' || t, 'TODO', 'yet_to_start', now(), g.id, g.user_id
+       FROM goals g CROSS JOIN generate_series(1, :tasks_per_goal) t
+       WHERE g.description = 'Seeded goal'""",
+    """INSERT INTO resources (id, title, url, created_at, task_id)
+       SELECT gen_random_uuid(), t.title, 'https://example.com/' || t.id, now(), t.id
+       FROM tasks t WHERE t.status = 'yet_to_start'""",
+    """INSERT INTO summaries (id, summary_type, description, created_at, user_id, goal_id, task_id)
+       SELECT gen_random_uuid(), 'goal_summary', 'Seeded summary', now(), t.user_id, t.goal_id, t.id
+       FROM tasks t WHERE t.status = 'yet_to_start'""",
+    """INSERT INTO progress (id, goal_progress, task_progress, last_updated, user_id, goal_id)
+       SELECT gen_random_uuid(), 0, 0, now(), g.user_id, g.id
+       FROM goals g WHERE g.description = 'Seeded goal'""",
+    """INSERT INTO notifications (id, message, is_read, created_at, user_id, task_id, goal_id)
+       SELECT gen_random_uuid(), 'Seeded notification', false, now(), t.user_id, t.id, t.goal_id
+       FROM tasks t WHERE t.status = 'yet_to_start'""",
+    """INSERT INTO idempotency_keys (key, user_id, request_fingerprint, status, created_at, expires_at)
+       SELECT 'plancheck-' || k, u.id::text, md5(k::text) || md5(k::text), 'completed', now(), now() + interval '1 day'
+       FROM users u CROSS JOIN generate_series(1, 3) k
+       WHERE u.email LIKE 'plancheck-%'""",
+    """INSERT INTO rate_limit_buckets (key, tokens, updated_at)
+       SELECT 'llm:plancheck-' || i, 1, now() FROM generate_series(1, :users) i""",
+    # One import batch of exported goals in the admin import's staging table
+    f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (doc jsonb) ON COMMIT DELETE ROWS",
+    f"""INSERT INTO {STAGING_TABLE} (doc)
+       SELECT to_jsonb(g) || jsonb_build_object(
+                  'type', 'goal',
+                  'tasks', (SELECT coalesce(jsonb_agg(t), '[]'::jsonb) FROM tasks t WHERE t.goal_id = g.id),
+                  'progress', (SELECT to_jsonb(p) FROM progress p WHERE p.goal_id = g.id LIMIT 1))
+       FROM goals g WHERE g.description = 'Seeded goal' LIMIT {IMPORT_BATCH_ROWS}""",
+]
+
+SEEDED_TABLES = [
+    "users", "goals", "tasks", "resources", "summaries", "progress",
+    "notifications", "idempotency_keys", "rate_limit_buckets", STAGING_TABLE,
+]
+
+# Tables on which a sequential scan is expected: full listings, the unfiltered admin
+# export of every goal, and the import staging table, which holds exactly one batch
+# and is read in full by each merge statement
+ALLOWED_SEQ_SCANS = {
+    "users.read_users": {"users"},
+    "admin.export_goals": {"goals"},
+    **{
+        f"admin.import_goals?on_conflict={on_conflict}:{name}": {STAGING_TABLE}
+        for on_conflict in ("skip", "update") for name in ("goals", "tasks", "progress")
+    },
+    "admin.import_goals:bump_versions": {STAGING_TABLE},
+}
+
+
+def hot_queries(ids: dict) -> dict:
+    """Every query issued from app/api/* (and the services they call), keyed by caller"""
+    User, Goal = models.User, models.Goal
+    goal_table = Goal.__table__
+    idem, bucket = models.IdempotencyKey, models.RateLimitBucket
+
+    queries = {
+        "users.create_user/login_user": select(User).where(func.lower(User.email) == ids["email"]),
+        "users.read_users": select(User),
+        "users.read_user": select(User).where(User.id == ids["user_id"]),
+        "users.update_user": update(User).where(User.id == ids["user_id"]).values(email=ids["email"], password="x"),
+        "users.delete_user": delete(User).where(User.id == ids["user_id"]),
+        "auth.google_callback": select(User).where(User.email == ids["email"]),
+        "goals.read_goals:version": select(User.goals_version).where(User.id == ids["user_id"]),
+        "goals.bump_goals_version": update(User).where(User.id == ids["user_id"]).values(goals_version=User.goals_version + 1),
+        "goals.read_goals": select(Goal).where(Goal.user_id == ids["user_id"]),
+        "goals.read_goals?q": select(Goal).where(Goal.user_id == ids["user_id"], Goal.title.ilike("%goal%")),
+        "goals.regenerate_plan_section": select(goal_table).where(goal_table.c.id == ids["goal_id"]).with_for_update(),
+        "goals.regenerate_plan_section:update": update(goal_table).where(goal_table.c.id == ids["goal_id"]).values(resources="[]"),
+        "idempotency.load_key": select(idem).where(idem.user_id == ids["user_id"], idem.key == "plancheck-1"),
+        "idempotency.claim_key": delete(idem).where(
+            idem.user_id == ids["user_id"], idem.key == "plancheck-1",
+            or_(idem.expires_at < datetime.utcnow(), idem.locked_until < datetime.utcnow()),
+        ),
+        "idempotency.renew_lease/store_response": update(idem).where(
+            idem.user_id == ids["user_id"], idem.key == "plancheck-1", idem.owner_token == "plancheck"
+        ).values(status="completed"),
+        "idempotency.sweep_expired_keys": delete(idem).where(idem.expires_at < datetime.utcnow()),
+        "admission.bucket_sweep": delete(bucket).where(bucket.updated_at < datetime.utcnow()),
+        "admission.bucket_take": select(bucket.tokens, bucket.updated_at).where(bucket.key == "llm:plancheck-1").with_for_update(),
+    }
+
+    # ON DELETE CASCADE: deleting a user/goal/task deletes child rows by foreign key
+    parents = {"users.id": ids["user_id"], "goals.id": ids["goal_id"], "tasks.id": ids["task_id"]}
+    for table in models.Base.metadata.sorted_tables:
+        for fk in table.foreign_keys:
+            if fk.ondelete == "CASCADE":
+                target = fk.target_fullname
+                queries[f"cascade {target} -> {table.name}.{fk.parent.name}"] = (
+                    delete(table).where(fk.parent == parents[target])
+                )
+    # Raw SQL of the admin export/import (app/services/goal_transfer.py)
+    goal_columns = ", ".join(f"g.{column}" for column in GOAL_COLUMNS)
+    queries["admin.export_goals"] = text(EXPORT_SQL.format(goal_columns=goal_columns, where=""))
+    queries["admin.export_goals?user_id"] = text(EXPORT_SQL.format(
+        goal_columns=goal_columns, where="WHERE g.user_id = ANY(CAST(:user_ids AS uuid[]))"
+    )).bindparams(user_ids=[ids["user_id"]])
+    for on_conflict in ("skip", "update"):
+        for name, sql in merge_statements(on_conflict):
+            queries[f"admin.import_goals?on_conflict={on_conflict}:{name}"] = text(sql)
+    queries["admin.import_goals:bump_versions"] = text(BUMP_VERSIONS_SQL)
+    return queries
+
+
+def seq_scans(plan: dict) -> list:
+    found = [plan["Relation Name"]] if plan.get("Node Type") == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        found += seq_scans(child)
+    return found
+
+
+def explain(conn, statement) -> dict:
+    compiled = statement.compile(dialect=conn.dialect)
+    result = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params)
+    return result.scalar()[0]["Plan"]
+
+
+def check_query_plans(users: int, goals_per_user: int, tasks_per_goal: int) -> bool:
+    engine = create_engine(settings.DATABASE_URL.replace("+asyncpg", ""))
+    ok = True
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            params = {"users": users, "goals_per_user": goals_per_user, "tasks_per_goal": tasks_per_goal}
+            for sql in SEED_SQL:
+                conn.execute(text(sql), params)
+            for table in SEEDED_TABLES:
+                conn.execute(text(f"ANALYZE {table}"))
+
+            task = conn.execute(text(
+                "SELECT t.id, t.goal_id, t.user_id, u.email FROM tasks t JOIN users u ON u.id = t.user_id "
+                "WHERE u.email LIKE 'plancheck-%' LIMIT 1"
+            )).one()
+            ids = {"user_id": str(task.user_id), "goal_id": str(task.goal_id), "task_id": str(task.id), "email": task.email}
+
+            for name, statement in hot_queries(ids).items():
+                scanned = set(seq_scans(explain(conn, statement))) - ALLOWED_SEQ_SCANS.get(name, set())
+                if scanned:
+                    ok = False
+                    print(f"FAIL  {name}: sequential scan on {', '.join(sorted(scanned))}")
+                else:
+                    print(f"ok    {name}")
+        finally:
+            trans.rollback()
+
+    engine.dispose()
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--goals-per-user", type=int, default=5)
+    parser.add_argument("--tasks-per-goal", type=int, default=4)
+    args = parser.parse_args()
+
+    if not check_query_plans(args.users, args.goals_per_user, args.tasks_per_goal):
+        sys.exit(1)
+    print("All hot queries use indexes.")
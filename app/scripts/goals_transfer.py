@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+
+from fastapi import HTTPException
+
+from app.db.database import database
+from app.services.goal_transfer import export_goals, import_goals
+
+READ_CHUNK_BYTES = 1 << 20
+
+async def run_export(path, user_ids):
+    stats = {}
+    written = 0
+    await database.connect()
+    try:
+        with open(path, "wb") as out:
+            async for chunk in export_goals(user_ids, stats):
+                out.write(chunk)
+                written += len(chunk)
+    finally:
+        await database.disconnect()
+    print(f"Exported {stats['rows']} goals ({written / 1e6:.1f} MB) in {stats['seconds']}s "
+          f"- {stats['rows_per_second']} rows/s")
+
+async def read_chunks(path):
+    with open(path, "rb") as src:
+        while chunk := src.read(READ_CHUNK_BYTES):
+            yield chunk
+
+async def run_import(path, on_conflict):
+    await database.connect()
+    try:
+        result = await import_goals(read_chunks(path), on_conflict)
+    except HTTPException as e:
+        print(f"Import stopped: {e.detail['message']}")
+        print(f"Committed before the failure: {e.detail['committed']}")
+        raise SystemExit(1)
+    finally:
+        await database.disconnect()
+    print(f"Imported {result['goals']} goals, {result['tasks']} tasks, {result['progress']} progress records "
+          f"from {result['lines']} lines in {result['seconds']}s - {result['rows_per_second']} rows/s"
+          f" ({result['invalid_plan_items']} invalid plan items dropped)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk export / import goals as zstd-compressed NDJSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = commands.add_parser("export")
+    export_cmd.add_argument("path")
+    export_cmd.add_argument("--user-id", action="append", help="limit to these users (repeatable)")
+
+    import_cmd = commands.add_parser("import")
+    import_cmd.add_argument("path")
+    import_cmd.add_argument("--on-conflict", choices=["skip", "update"], default="skip")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        asyncio.run(run_export(args.path, args.user_id))
+    else:
+        asyncio.run(run_import(args.path, args.on_conflict))
@@ -0,0 +1,14 @@
+import argparse
+import time
+
+from app.core.config import settings
+from app.services.frontend_assets import precompress_build
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write .br/.zst/.gz files next to the React build for FastAPI to serve")
+    parser.add_argument("build_dir", nargs="?", default=settings.FRONTEND_BUILD_DIR)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    written = precompress_build(args.build_dir, settings.COMPRESSION_MIN_BYTES)
+    print(f"Wrote {written} precompressed files in {time.perf_counter() - start:.1f}s")
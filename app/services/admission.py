@@ -0,0 +1,222 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, Request
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
+from app.db import models
+from app.db.database import engine
+
+
+# ✅ TOKEN BUCKET STORES
+# take() consumes one token and returns 0, or returns the seconds until a token is available.
+# refund() gives a token back for a request that was admitted but then shed.
+# sweep() forgets buckets that have refilled completely (they carry no state).
+class InMemoryBucketStore:
+    """Per-process buckets; the clock is injectable"""
+
+    def __init__(self, clock=time.monotonic, max_keys: int = 10000):
+        self._clock = clock
+        self._max_keys = max_keys
+        self._buckets = {}
+
+    async def take(self, key: str, rate: float, capacity: int) -> float:
+        now = self._clock()
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+
+        if len(self._buckets) >= self._max_keys:
+            await self.sweep(rate, capacity)
+
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (1 - tokens) / rate
+
+    async def refund(self, key: str, capacity: int):
+        if key in self._buckets:
+            tokens, updated = self._buckets[key]
+            self._buckets[key] = (min(capacity, tokens + 1), updated)
+
+    async def sweep(self, rate: float, capacity: int) -> int:
+        now = self._clock()
+        before = len(self._buckets)
+        self._buckets = {
+            key: (tokens, updated) for key, (tokens, updated) in self._buckets.items()
+            if tokens + (now - updated) * rate < capacity
+        }
+        return before - len(self._buckets)
+
+
+class PostgresBucketStore:
+    """Buckets shared by every worker, stored in the rate_limit_buckets table"""
+
+    async def take(self, key: str, rate: float, capacity: int) -> float:
+        table = models.RateLimitBucket
+        now = datetime.utcnow()
+        async with engine.begin() as conn:
+            await conn.execute(
+                pg_insert(table)
+                .values(key=key, tokens=capacity, updated_at=now)
+                .on_conflict_do_nothing(index_elements=["key"])
+            )
+            result = await conn.execute(select(table.tokens, table.updated_at).where(table.key == key).with_for_update())
+            row = result.first()
+            elapsed = max(0.0, (now - row.updated_at).total_seconds())
+            tokens = min(capacity, row.tokens + elapsed * rate)
+
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            await conn.execute(update(table).where(table.key == key).values(tokens=tokens, updated_at=now))
+        return wait
+
+    async def refund(self, key: str, capacity: int):
+        table = models.RateLimitBucket
+        async with engine.begin() as conn:
+            await conn.execute(
+                update(table).where(table.key == key).values(tokens=func.least(capacity, table.tokens + 1))
+            )
+
+    async def sweep(self, rate: float, capacity: int) -> int:
+        # Idle for capacity / rate seconds means full whatever it held, so this stays an index range scan
+        table = models.RateLimitBucket
+        cutoff = datetime.utcnow() - timedelta(seconds=capacity / rate)
+        async with engine.begin() as conn:
+            result = await conn.execute(delete(table).where(table.updated_at < cutoff))
+            return result.rowcount
+
+
+BUCKET_STORES = {
+    "memory": InMemoryBucketStore,
+    "postgres": PostgresBucketStore,
+}
+
+
+# ✅ GLOBAL CONCURRENCY CAP
+class ConcurrencyLimiter:
+    """Caps in-flight LLM calls per worker with a bounded wait queue"""
+
+    def __init__(self, limit: int, max_queue: int, queue_timeout: float):
+        self._semaphore = asyncio.Semaphore(limit)
+        self._max_queue = max_queue
+        self._queue_timeout = queue_timeout
+        self._waiting = 0
+
+    def _overloaded(self):
+        return HTTPException(
+            status_code=503,
+            detail="AI plan service is busy, please retry shortly",
+            headers={"Retry-After": str(settings.LLM_RETRY_AFTER_SECONDS)},
+        )
+
+    async def try_acquire(self) -> bool:
+        """Take a free slot without queueing; False when every slot is busy"""
+        if self._semaphore.locked():
+            return False
+        # Returns without suspending when the semaphore is not locked
+        await self._semaphore.acquire()
+        return True
+
+    async def acquire(self):
+        """Take a slot, queueing for up to queue_timeout; 503 when the queue is full or times out"""
+        if self._semaphore.locked():
+            if self._waiting >= self._max_queue:
+                raise self._overloaded()
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self._queue_timeout)
+            except asyncio.TimeoutError:
+                raise self._overloaded()
+            finally:
+                self._waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+    def release(self):
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class AdmissionController:
+    def __init__(self, store, limiter: ConcurrencyLimiter, rate_per_minute: float, burst: int):
+        self.store = store
+        self.limiter = limiter
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+
+    @asynccontextmanager
+    async def admit(self, user_key: str):
+        """Reject over-quota users with 429, then wait for a global LLM slot (503 when the queue is full)"""
+        bucket = f"llm:{user_key}"
+        wait = await self.store.take(bucket, self.rate, self.burst)
+        if wait > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many AI plan requests, please slow down",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+        try:
+            await self.limiter.acquire()
+        except HTTPException:
+            # Shed requests never reached the LLM, so they do not use up the caller's quota
+            await self.store.refund(bucket, self.burst)
+            raise
+        try:
+            yield
+        finally:
+            self.limiter.release()
+
+    async def sweep(self) -> int:
+        return await self.store.sweep(self.rate, self.burst)
+
+
+def user_key(user_id) -> str:
+    """Bucket for a user the endpoint has verified (existing user, or owner of the goal)"""
+    return f"user:{user_id}"
+
+
+def client_key(request: Request) -> str:
+    """Bucket by client address, for endpoints with no verified user (POST /goals/ai-plan).
+
+    User ids in headers are client-supplied and could be rotated past the quota.
+    Behind a proxy or load balancer, run uvicorn with --forwarded-allow-ips set to
+    the proxy's address so request.client is the real caller, not the proxy.
+    """
+    return f"ip:{request.client.host}" if request.client else "ip:anonymous"
+
+
+llm_admission = AdmissionController(
+    store=BUCKET_STORES[settings.ADMISSION_STORE](),
+    limiter=ConcurrencyLimiter(
+        settings.LLM_MAX_CONCURRENCY, settings.LLM_MAX_QUEUE, settings.LLM_QUEUE_TIMEOUT_SECONDS
+    ),
+    rate_per_minute=settings.LLM_USER_RATE_PER_MINUTE,
+    burst=settings.LLM_USER_BURST,
+)
+
+
+async def sweep_buckets_forever():
+    while True:
+        try:
+            removed = await llm_admission.sweep()
+            if removed:
+                print(f"Swept {removed} idle rate limit buckets")
+        except Exception as e:
+            print(f"Rate limit sweep error: {e}")
+        await asyncio.sleep(settings.ADMISSION_SWEEP_INTERVAL_SECONDS)
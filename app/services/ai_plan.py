@@ -0,0 +1,167 @@
+from functools import lru_cache
+
+from pydantic import BaseModel
+from langchain_openai import ChatOpenAI
+from langchain_core.prompts import PromptTemplate
+from langchain_core.output_parsers import JsonOutputParser
+
+from app.core.config import settings
+from app.schema.goal import LearningPlan, WeeklyScheduleSlice, ResourcesSlice, MilestonesSlice
+
+# ✅ VERSIONED PROMPTS
+# Each version pins its output mode:
+#   "text"       -> format instructions inlined, response parsed by JsonOutputParser
+#   "structured" -> schema bound natively via tool calling, no parsing step
+LEARNING_PLAN_V1 = """You are an expert learning plan generator. Create a detailed, personalized learning plan.
+
+Learning Goal: {title}
+Description: {description}
+Duration: {duration_days} days
+Start Date: {start_date}
+End Date: {end_date}
+Difficulty Level: {difficulty}
+Study Schedule: {study_schedule}
+Weekly Hours Available: {weekly_hours}
+Preferred Learning Style: {learning_style}
+
+Generate a comprehensive learning plan with:
+1. A weekly schedule with specific days, topics, and durations
+2. Curated learning resources (courses, videos, books, articles) with real URLs when possible
+3. Progressive milestones to track learning progress
+
+{format_instructions}
+
+Provide ONLY valid JSON output. No additional text or explanations."""
+
+LEARNING_PLAN_V2 = """You are an expert learning plan generator. Create a detailed, personalized learning plan.
+
+Learning Goal: {title}
+Description: {description}
+Duration: {duration_days} days
+Start Date: {start_date}
+End Date: {end_date}
+Difficulty Level: {difficulty}
+Study Schedule: {study_schedule}
+Weekly Hours Available: {weekly_hours}
+Preferred Learning Style: {learning_style}
+
+Include a weekly schedule with specific days, topics and durations, curated resources \
+(courses, videos, books, articles) with real URLs when possible, and progressive milestones."""
+
+# v3: week-labelled days, so a week range can later be regenerated on its own
+LEARNING_PLAN_V3 = """You are an expert learning plan generator. Create a detailed, personalized learning plan.
+
+Learning Goal: {title}
+Description: {description}
+Duration: {duration_days} days
+Start Date: {start_date}
+End Date: {end_date}
+Difficulty Level: {difficulty}
+Study Schedule: {study_schedule}
+Weekly Hours Available: {weekly_hours}
+Preferred Learning Style: {learning_style}
+
+Include a weekly schedule with specific days (labelled like "Week 1 - Monday"), topics and durations, \
+curated resources (courses, videos, books, articles) with real URLs when possible, and progressive milestones."""
+
+# Partial regeneration: only one section of an existing plan is sent and returned
+PLAN_SECTION_V1 = """You are an expert learning plan generator. Rewrite one section of an existing learning plan.
+
+Learning Goal: {title}
+Duration: {duration_days} days
+Difficulty Level: {difficulty}
+Weekly Hours Available: {weekly_hours}
+Preferred Learning Style: {learning_style}
+
+Rest of the plan (summary):
+{context}
+
+Current {section}:
+{current}
+
+Return only the new {section}. {section_rules}
+User request: {instructions}"""
+
+PROMPTS = {
+    "learning_plan": {
+        "v1": {"template": LEARNING_PLAN_V1, "schema": LearningPlan, "mode": "text"},
+        "v2": {"template": LEARNING_PLAN_V2, "schema": LearningPlan, "mode": "structured"},
+        "v3": {"template": LEARNING_PLAN_V3, "schema": LearningPlan, "mode": "structured"},
+    },
+    "plan_weeks": {
+        "v1": {"template": PLAN_SECTION_V1, "schema": WeeklyScheduleSlice, "mode": "structured"},
+    },
+    "plan_resources": {
+        "v1": {"template": PLAN_SECTION_V1, "schema": ResourcesSlice, "mode": "structured"},
+    },
+    "plan_milestones": {
+        "v1": {"template": PLAN_SECTION_V1, "schema": MilestonesSlice, "mode": "structured"},
+    },
+}
+
+ACTIVE_VERSIONS = {
+    "learning_plan": settings.AI_PLAN_PROMPT_VERSION,
+    "plan_weeks": "v1",
+    "plan_resources": "v1",
+    "plan_milestones": "v1",
+}
+
+
+def get_tier_config(tier: str = None) -> dict:
+    tier = tier or settings.LLM_DEFAULT_TIER
+    try:
+        return settings.LLM_TIERS[tier]
+    except KeyError:
+        raise ValueError(f"Unknown LLM tier {tier}")
+
+
+@lru_cache(maxsize=None)
+def get_llm(tier: str = None):
+    """One client per backend tier; base_url lets a tier point at a local OpenAI-compatible server"""
+    config = get_tier_config(tier)
+    return ChatOpenAI(
+        model=config["model"],
+        api_key=config.get("api_key", settings.OPENAI_API_KEY),
+        base_url=config.get("base_url"),
+        temperature=config.get("temperature", 0.7),
+    )
+
+
+def get_prompt_spec(name: str, version: str = None) -> dict:
+    version = version or ACTIVE_VERSIONS[name]
+    try:
+        return PROMPTS[name][version]
+    except KeyError:
+        raise ValueError(f"Unknown prompt {name}:{version}")
+
+
+def build_prompt(name: str, version: str = None) -> PromptTemplate:
+    """Build the PromptTemplate for a registered prompt version"""
+    spec = get_prompt_spec(name, version)
+    prompt = PromptTemplate.from_template(spec["template"])
+    if spec["mode"] == "text":
+        parser = JsonOutputParser(pydantic_object=spec["schema"])
+        prompt = prompt.partial(format_instructions=parser.get_format_instructions())
+    return prompt
+
+
+@lru_cache(maxsize=None)
+def get_chain(name: str, version: str = None, tier: str = None):
+    """Compile a prompt version into a runnable chain once per tier and reuse it"""
+    spec = get_prompt_spec(name, version)
+    prompt = build_prompt(name, version)
+    llm = get_llm(tier)
+
+    if spec["mode"] == "structured":
+        method = get_tier_config(tier).get("structured_method", "function_calling")
+        return prompt | llm.with_structured_output(spec["schema"], method=method)
+    return prompt | llm | JsonOutputParser(pydantic_object=spec["schema"])
+
+
+async def run_chain(name: str, variables: dict, version: str = None, tier: str = None) -> dict:
+    """Invoke a registered chain and return the plan as a plain dict"""
+    chain = get_chain(name, version, tier)
+    result = await chain.ainvoke(variables)
+    if isinstance(result, BaseModel):
+        result = result.model_dump()
+    return result
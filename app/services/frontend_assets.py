@@ -0,0 +1,260 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+import brotli
+import zstandard
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Match
+
+from app.services.http_cache import encoded_etag, matching_etag, negotiate_encoding
+
+# Preference order when the browser accepts several
+ASSET_ENCODINGS = ("br", "zstd", "gzip")
+# Precompressed siblings written at build time (app/scripts/precompress_frontend.py)
+VARIANT_SUFFIXES = {"br": ".br", "zstd": ".zst", "gzip": ".gz"}
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "application/manifest+json", "image/svg+xml")
+
+# Create React App puts content-hashed bundles under static/
+HASHED_PREFIX = "static/"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+mimetypes.add_type("application/json", ".map")
+
+
+# Best ratio, used once per build; the lazy fallback trades some ratio for ~10 ms per file
+BUILD_COMPRESSORS = {
+    "br": lambda body: brotli.compress(body, quality=11),
+    "zstd": lambda body: zstandard.ZstdCompressor(level=19).compress(body),
+    "gzip": lambda body: gzip.compress(body, compresslevel=9, mtime=0),
+}
+LAZY_COMPRESSORS = {
+    "br": lambda body: brotli.compress(body, quality=5),
+    "zstd": lambda body: zstandard.ZstdCompressor(level=10).compress(body),
+    "gzip": lambda body: gzip.compress(body, compresslevel=6, mtime=0),
+}
+DECOMPRESSORS = {
+    "br": brotli.decompress,
+    "zstd": lambda data: zstandard.ZstdDecompressor().decompress(data, max_output_size=1 << 30),
+    "gzip": gzip.decompress,
+}
+
+
+def compressible(content_type: str, size: int, min_compress_bytes: int) -> bool:
+    return size >= min_compress_bytes and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def precompress_build(build_dir: str, min_compress_bytes: int = 1024) -> int:
+    """Write .br/.zst/.gz next to each compressible build file (when smaller); returns files written"""
+    written = 0
+    for root, _, files in os.walk(build_dir):
+        for name in files:
+            if name.endswith(tuple(VARIANT_SUFFIXES.values())):
+                continue
+            full_path = os.path.join(root, name)
+            with open(full_path, "rb") as f:
+                body = f.read()
+            content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            for encoding, suffix in VARIANT_SUFFIXES.items():
+                if os.path.exists(full_path + suffix):
+                    os.remove(full_path + suffix)
+                if not compressible(content_type, len(body), min_compress_bytes):
+                    continue
+                data = BUILD_COMPRESSORS[encoding](body)
+                if len(data) < len(body):
+                    with open(full_path + suffix, "wb") as f:
+                        f.write(data)
+                    written += 1
+    return written
+
+
+class Asset:
+    """One build file; compressed variants come from disk or are built on first request"""
+
+    def __init__(self, full_path: str, rel_path: str, min_compress_bytes: int):
+        with open(full_path, "rb") as f:
+            body = f.read()
+        self.content_type = mimetypes.guess_type(rel_path)[0] or "application/octet-stream"
+        self.cache_control = IMMUTABLE if rel_path.startswith(HASHED_PREFIX) else REVALIDATE
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.last_modified = int(os.path.getmtime(full_path))
+        self.variants = {None: body}
+        self.encodings = ()
+
+        if compressible(self.content_type, len(body), min_compress_bytes):
+            self.encodings = ASSET_ENCODINGS
+            for encoding, suffix in VARIANT_SUFFIXES.items():
+                if os.path.exists(full_path + suffix):
+                    with open(full_path + suffix, "rb") as f:
+                        data = f.read()
+                    # A variant left over from an older build must not be served for this one
+                    try:
+                        if DECOMPRESSORS[encoding](data) == body:
+                            self.variants[encoding] = data
+                    except Exception:
+                        pass
+
+    async def variant(self, encoding: Optional[str]) -> tuple:
+        """(encoding, body) to send; compresses once on first use when no build-time file exists"""
+        if encoding not in self.variants:
+            data = await run_in_threadpool(LAZY_COMPRESSORS[encoding], self.variants[None])
+            if len(data) < len(self.variants[None]):
+                self.variants[encoding] = data
+            else:
+                # Not worth it: stop offering this encoding
+                self.encodings = tuple(name for name in self.encodings if name != encoding)
+                return None, self.variants[None]
+        return encoding, self.variants[encoding]
+
+
+class FrontendAssets:
+    def __init__(self, build_dir: str, min_compress_bytes: int = 1024):
+        self.assets = {}
+        for root, _, files in os.walk(build_dir):
+            for name in files:
+                if name.endswith(tuple(VARIANT_SUFFIXES.values())):
+                    continue
+                full_path = os.path.join(root, name)
+                rel_path = os.path.relpath(full_path, build_dir).replace(os.sep, "/")
+                self.assets[rel_path] = Asset(full_path, rel_path, min_compress_bytes)
+        self.index = self.assets.get("index.html")
+
+    def lookup(self, path: str) -> Optional[Asset]:
+        """Exact build file, or index.html for SPA routes (paths without a file extension)"""
+        rel_path = path.lstrip("/")
+        asset = self.assets.get(rel_path)
+        if asset is None and "." not in rel_path.rsplit("/", 1)[-1]:
+            asset = self.index
+        return asset
+
+
+def _not_modified(asset: Asset, request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # If-None-Match takes precedence over If-Modified-Since
+        return matching_etag(if_none_match, asset.etag, asset.encodings) is not None
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return asset.last_modified <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _byte_range(range_header: str, size: int):
+    """Parse a single "bytes=" range: (start, end), "unsatisfiable", or None to send everything"""
+    if not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start, _, end = range_header[6:].strip().partition("-")
+    try:
+        if start == "":
+            length = int(end)
+            if length == 0:
+                return "unsatisfiable"
+            return max(0, size - length), size - 1
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return "unsatisfiable"
+    return start, end
+
+
+async def asset_response(asset: Asset, request: Request, vary: str = "Accept-Encoding") -> Response:
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), asset.encodings)
+    encoding, body = await asset.variant(encoding)
+    etag = encoded_etag(asset.etag, encoding)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(asset.last_modified, usegmt=True),
+        "Cache-Control": asset.cache_control,
+        "Accept-Ranges": "bytes",
+        "Vary": vary,
+    }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    if _not_modified(asset, request, etag):
+        return Response(status_code=304, headers=headers)
+
+    status_code = 200
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range == etag):
+        byte_range = _byte_range(range_header, len(body))
+        if byte_range == "unsatisfiable":
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(body)}"})
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+            body = body[start:end + 1]
+            status_code = 206
+
+    headers["Content-Length"] = str(len(body))
+    if request.method == "HEAD":
+        body = b""
+    return Response(content=body, status_code=status_code, media_type=asset.content_type, headers=headers)
+
+
+class FrontendMiddleware:
+    """Serve the React build on the API's origin.
+
+    API routes always win; a GET/HEAD that no route (or its trailing-slash
+    redirect) would handle is answered from the build, falling back to
+    index.html for client-side routes. Browsers asking for "/" get the SPA too,
+    so both representations of "/" are sent with Vary: Accept.
+    """
+
+    def __init__(self, app, assets: FrontendAssets, router):
+        self.app = app
+        self.assets = assets
+        self.router = router
+
+    def _routed(self, scope) -> bool:
+        path = scope["path"]
+        alternate = path[:-1] if path.endswith("/") else path + "/"
+        for candidate in (path, alternate):
+            candidate_scope = {**scope, "path": candidate}
+            if any(route.matches(candidate_scope)[0] != Match.NONE for route in self.router.routes):
+                return True
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope, receive)
+        if scope["path"] == "/":
+            if "text/html" in request.headers.get("accept", "") and self.assets.index is not None:
+                response = await asset_response(self.assets.index, request, vary="Accept, Accept-Encoding")
+                await response(scope, receive, send)
+            else:
+                await self.app(scope, receive, self._add_vary_accept(send))
+            return
+
+        if not self._routed(scope):
+            asset = self.assets.lookup(scope["path"])
+            if asset is not None:
+                await (await asset_response(asset, request))(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _add_vary_accept(send):
+        async def send_with_vary(message):
+            if message["type"] == "http.response.start":
+                headers = [(name, value) for name, value in message.get("headers", []) if name.lower() != b"vary"]
+                vary = [value.decode() for name, value in message.get("headers", []) if name.lower() == b"vary"]
+                headers.append((b"vary", ", ".join(["Accept", *vary]).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+        return send_with_vary
@@ -0,0 +1,238 @@
+import time
+
+import orjson
+import zstandard
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.db import models
+from app.db.database import database
+from app.services.serialization import PLAN_COLUMNS, dump_plan_column, normalize_plan_items
+
+EXPORT_FLUSH_ROWS = 1000
+IMPORT_BATCH_ROWS = 5000
+
+GOAL_COLUMNS = [column.name for column in models.Goal.__table__.columns]
+
+# One goal per line with its tasks and progress record aggregated in SQL,
+# so the export is a single server-side cursor and JSON arrives pre-encoded.
+EXPORT_SQL = """
+SELECT {goal_columns},
+       (SELECT coalesce(json_agg(t), '[]'::json) FROM tasks t WHERE t.goal_id = g.id) AS tasks,
+       (SELECT row_to_json(p) FROM progress p WHERE p.goal_id = g.id LIMIT 1) AS progress_record
+FROM goals g
+{where}
+ORDER BY g.user_id, g.id
+"""
+
+
+# ✅ EXPORT
+def _goal_line(row) -> bytes:
+    doc = {"type": "goal"}
+    for column in GOAL_COLUMNS:
+        value = row[column]
+        if column in PLAN_COLUMNS:
+            value = orjson.Fragment(value) if value else []
+        doc[column] = value
+    doc["tasks"] = orjson.Fragment(row["tasks"])
+    doc["progress"] = orjson.Fragment(row["progress_record"]) if row["progress_record"] else None
+    # default=str covers asyncpg's own UUID type in raw text queries
+    return orjson.dumps(doc, default=str, option=orjson.OPT_APPEND_NEWLINE)
+
+
+async def export_goals(user_ids: list = None, stats: dict = None):
+    """Yield the goals (plans, tasks, progress) as zstd-compressed NDJSON chunks.
+
+    Rows come from a server-side cursor and are compressed as they stream, so
+    memory stays constant. The last line is a summary with the throughput.
+    """
+    stats = stats if stats is not None else {}
+    where = "WHERE g.user_id = ANY(CAST(:user_ids AS uuid[]))" if user_ids else ""
+    query = text(EXPORT_SQL.format(
+        goal_columns=", ".join(f"g.{column}" for column in GOAL_COLUMNS), where=where
+    ))
+    if user_ids:
+        query = query.bindparams(user_ids=[str(user_id) for user_id in user_ids])
+
+    compressor = zstandard.ZstdCompressor(level=3).compressobj()
+    start = time.perf_counter()
+    rows = 0
+
+    async for row in database.iterate(query):
+        chunk = compressor.compress(_goal_line(row))
+        rows += 1
+        if rows % EXPORT_FLUSH_ROWS == 0:
+            chunk += compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if chunk:
+            yield chunk
+
+    elapsed = time.perf_counter() - start
+    stats.update(rows=rows, seconds=round(elapsed, 3), rows_per_second=round(rows / elapsed) if elapsed else rows)
+    yield compressor.compress(orjson.dumps({"type": "summary", **stats}, option=orjson.OPT_APPEND_NEWLINE))
+    yield compressor.flush()
+
+
+# ✅ IMPORT
+# NDJSON lines are COPY'd into a jsonb staging table, then merged with set-based
+# INSERT ... SELECT statements that cast each field to its column type. Plan columns
+# are normalized in Python first and staged as JSON strings, so they are stored in
+# the same validated, canonical form as goals created through the API.
+STAGING_TABLE = "goal_import"
+PG_DIALECT = postgresql.dialect()
+
+
+def _json_select(table, source: str) -> str:
+    return ", ".join(
+        f"({source}->>'{column.name}')::{column.type.compile(dialect=PG_DIALECT)} AS {column.name}"
+        for column in table.columns
+    )
+
+
+def _merge_sql(table, source_sql: str, exists_sql: str, on_conflict: str) -> str:
+    columns = [column.name for column in table.columns]
+    if on_conflict == "update":
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns if column != "id")
+        conflict = f"ON CONFLICT (id) DO UPDATE SET {updates}"
+    else:
+        conflict = "ON CONFLICT (id) DO NOTHING"
+    return (
+        f"INSERT INTO {table.name} ({', '.join(columns)}) "
+        f"SELECT {', '.join(columns)} FROM ({source_sql}) s WHERE {exists_sql} {conflict}"
+    )
+
+
+def merge_statements(on_conflict: str) -> list:
+    goals, tasks, progress = models.Goal.__table__, models.Task.__table__, models.Progress.__table__
+    goal_source = f"SELECT {_json_select(goals, 'doc')} FROM {STAGING_TABLE} WHERE doc->>'type' = 'goal'"
+    task_source = (
+        f"SELECT {_json_select(tasks, 'task')} FROM {STAGING_TABLE}, jsonb_array_elements(doc->'tasks') task "
+        f"WHERE doc->>'type' = 'goal'"
+    )
+    progress_columns = _json_select(progress, "doc->'progress'")
+    progress_source = (
+        f"SELECT {progress_columns} FROM {STAGING_TABLE} "
+        f"WHERE doc->>'type' = 'goal' AND jsonb_typeof(doc->'progress') = 'object'"
+    )
+    # Goals of users that do not exist here are skipped rather than failing the whole batch
+    user_exists = "EXISTS (SELECT 1 FROM users u WHERE u.id = s.user_id)"
+    goal_exists = "EXISTS (SELECT 1 FROM goals g WHERE g.id = s.goal_id)"
+    return [
+        ("goals", _merge_sql(goals, goal_source, user_exists, on_conflict)),
+        ("tasks", _merge_sql(tasks, task_source, goal_exists, on_conflict)),
+        ("progress", _merge_sql(progress, progress_source, goal_exists, on_conflict)),
+    ]
+
+
+BUMP_VERSIONS_SQL = f"""
+UPDATE users SET goals_version = goals_version + 1
+WHERE id IN (SELECT DISTINCT (doc->>'user_id')::uuid FROM {STAGING_TABLE} WHERE doc->>'type' = 'goal')
+"""
+
+
+async def _ndjson_lines(chunks):
+    """Decompress a zstd stream chunk by chunk and yield complete lines"""
+    decompressor = zstandard.ZstdDecompressor().decompressobj()
+    pending = b""
+    async for chunk in chunks:
+        data = pending + decompressor.decompress(chunk)
+        *lines, pending = data.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if pending.strip():
+        yield pending
+
+
+def _import_failed(status_code: int, message: str, totals: dict):
+    # Batches commit one by one, so the client needs to know what already landed
+    raise HTTPException(status_code=status_code, detail={
+        "message": f"{message}; earlier batches were committed",
+        "committed": totals,
+    })
+
+
+def _normalize_line(line: bytes, line_number: int, totals: dict) -> tuple:
+    """Staging record for one NDJSON line and the number of invalid plan items dropped"""
+    try:
+        doc = orjson.loads(line)
+        if isinstance(doc, dict) and doc.get("type") == "goal":
+            # Plan columns may also arrive as the JSON text stored in the column
+            for column in PLAN_COLUMNS:
+                if isinstance(doc.get(column), str):
+                    doc[column] = orjson.loads(doc[column]) if doc[column] else []
+    except orjson.JSONDecodeError:
+        _import_failed(400, f"Line {line_number} is not valid JSON", totals)
+    dropped = 0
+    if isinstance(doc, dict) and doc.get("type") == "goal":
+        for column in PLAN_COLUMNS:
+            items = doc.get(column)
+            normalized = normalize_plan_items(column, items)
+            dropped += len(items) - len(normalized) if isinstance(items, list) else 0
+            doc[column] = dump_plan_column(normalized)
+    return (orjson.dumps(doc).decode(),), dropped
+
+
+async def _load_batch(raw, records: list, statements: list) -> dict:
+    counts = {}
+    async with raw.transaction():
+        await raw.copy_records_to_table(STAGING_TABLE, records=records, columns=["doc"])
+        for name, sql in statements:
+            status = await raw.execute(sql)
+            counts[name] = int(status.rsplit(" ", 1)[-1])
+        await raw.execute(BUMP_VERSIONS_SQL)
+        # ON COMMIT DELETE ROWS empties the staging table for the next batch
+    return counts
+
+
+async def import_goals(chunks, on_conflict: str = "skip") -> dict:
+    """Bulk-load a zstd NDJSON export in fixed-size COPY batches.
+
+    on_conflict: "skip" keeps existing rows, "update" overwrites them.
+    Each batch commits on its own: a failure raises an HTTPException whose
+    detail holds the totals of the batches already committed.
+    """
+    statements = merge_statements(on_conflict)
+    totals = {"lines": 0, "goals": 0, "tasks": 0, "progress": 0, "invalid_plan_items": 0}
+    start = time.perf_counter()
+
+    async def flush(batch, dropped):
+        try:
+            counts = await _load_batch(raw, batch, statements)
+        except Exception as e:
+            print(f"Goal import error in lines {totals['lines'] + 1}-{totals['lines'] + len(batch)}: {e}")
+            _import_failed(
+                500, f"Lines {totals['lines'] + 1}-{totals['lines'] + len(batch)} could not be imported", totals
+            )
+        for name, count in counts.items():
+            totals[name] += count
+        totals["lines"] += len(batch)
+        totals["invalid_plan_items"] += dropped
+
+    async with database.connection() as connection:
+        raw = connection.raw_connection
+        await raw.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (doc jsonb) ON COMMIT DELETE ROWS"
+        )
+        batch, dropped = [], 0
+        try:
+            async for line in _ndjson_lines(chunks):
+                record, line_dropped = _normalize_line(line, totals["lines"] + len(batch) + 1, totals)
+                batch.append(record)
+                dropped += line_dropped
+                if len(batch) >= IMPORT_BATCH_ROWS:
+                    await flush(batch, dropped)
+                    batch, dropped = [], 0
+        except zstandard.ZstdError:
+            _import_failed(400, "Request body is not a valid zstd stream", totals)
+        if batch:
+            await flush(batch, dropped)
+
+    elapsed = time.perf_counter() - start
+    rows = totals["goals"] + totals["tasks"] + totals["progress"]
+    return {
+        **totals,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed) if elapsed else rows,
+    }
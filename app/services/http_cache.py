@@ -0,0 +1,93 @@
+import gzip
+import hashlib
+from typing import Optional
+
+import zstandard
+from fastapi import Response
+
+from app.core.config import settings
+
+# Preferred first when the client weighs encodings equally
+SUPPORTED_ENCODINGS = ("zstd", "gzip")
+
+_zstd_compressor = zstandard.ZstdCompressor(level=settings.ZSTD_LEVEL)
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag for the identity representation of a resource"""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    # Each content-coding is a different representation, so it gets its own strong ETag
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def matching_etag(if_none_match: Optional[str], etag: str, encodings=SUPPORTED_ENCODINGS) -> Optional[str]:
+    """Return the representation ETag from If-None-Match that is still current, if any"""
+    if not if_none_match:
+        return None
+    current = [encoded_etag(etag, encoding) for encoding in (None, *encodings)]
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return etag
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in current:
+            return candidate
+    return None
+
+
+def negotiate_encoding(accept_encoding: Optional[str], encodings=SUPPORTED_ENCODINGS) -> Optional[str]:
+    """Pick the best of encodings (in preference order) from Accept-Encoding (None = identity)"""
+    weights = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return _zstd_compressor.compress(body)
+    return gzip.compress(body, compresslevel=settings.GZIP_LEVEL, mtime=0)
+
+
+def not_modified(etag: str, cache_control: str = "private, no-cache") -> Response:
+    return Response(status_code=304, headers={
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    })
+
+
+def conditional_response(
+    body: bytes, etag: str, accept_encoding: Optional[str],
+    cache_control: str = "private, no-cache", media_type: str = "application/json"
+) -> Response:
+    """Build a (possibly compressed) response carrying the ETag of the chosen representation"""
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= settings.COMPRESSION_MIN_BYTES else None
+    headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if encoding:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    headers["ETag"] = encoded_etag(etag, encoding)
+    return Response(content=body, media_type=media_type, headers=headers)
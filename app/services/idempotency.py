@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
+from app.db import models
+from app.db.database import database, engine
+
+# Requests currently executing in this process, keyed by (user_id, Idempotency-Key).
+# Retries landing on the same worker wait on the event instead of polling.
+_inflight: dict = {}
+
+
+def request_fingerprint(payload: dict) -> str:
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _lease_expired(table, now: datetime):
+    # The owner renews locked_until while it runs; a lapsed lease means it crashed or was restarted
+    return and_(table.status == "in_progress", or_(table.locked_until.is_(None), table.locked_until < now))
+
+
+async def _claim_key(key: str, user_id: str, fingerprint: str):
+    """Insert the user's key as in_progress; returns the owner token, or None if another request owns it"""
+    now = datetime.utcnow()
+    table = models.IdempotencyKey
+    owner_token = str(uuid.uuid4())
+    async with engine.begin() as conn:
+        # An expired key, or one whose owner died mid-request, is treated as if it never existed
+        await conn.execute(
+            delete(table).where(
+                table.user_id == user_id,
+                table.key == key,
+                or_(table.expires_at < now, _lease_expired(table, now)),
+            )
+        )
+        result = await conn.execute(
+            pg_insert(table)
+            .values(
+                key=key,
+                user_id=user_id,
+                request_fingerprint=fingerprint,
+                status="in_progress",
+                owner_token=owner_token,
+                locked_until=now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS),
+                created_at=now,
+                expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+            )
+            .on_conflict_do_nothing(index_elements=["user_id", "key"])
+            .returning(table.key)
+        )
+        return owner_token if result.first() is not None else None
+
+
+async def _renew_lease(key: str, user_id: str, owner_token: str):
+    table = models.IdempotencyKey
+    while True:
+        await asyncio.sleep(settings.IDEMPOTENCY_LEASE_SECONDS / 3)
+        try:
+            await database.execute(
+                update(table)
+                .where(table.user_id == user_id, table.key == key, table.owner_token == owner_token)
+                .values(locked_until=datetime.utcnow() + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS))
+            )
+        except Exception as e:
+            print(f"Idempotency lease renewal error: {e}")
+
+
+async def _load_key(key: str, user_id: str):
+    table = models.IdempotencyKey
+    query = select(table).where(table.user_id == user_id, table.key == key)
+    return await database.fetch_one(query)
+
+
+def _stored_response(row) -> Response:
+    return Response(
+        content=row["response_body"],
+        status_code=row["response_status"],
+        media_type="application/json",
+        headers={"Idempotency-Replayed": "true"},
+    )
+
+
+async def _wait_for_key(key: str, user_id: str, fingerprint: str):
+    """Wait for the request that owns the key; returns its row, or None if it was released"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.IDEMPOTENCY_WAIT_TIMEOUT_SECONDS
+
+    event = _inflight.get((user_id, key))
+    if event is not None:
+        try:
+            await asyncio.wait_for(event.wait(), settings.IDEMPOTENCY_WAIT_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+    # Owner may live in another worker: fall back to polling the table
+    while True:
+        row = await _load_key(key, user_id)
+        if row is None:
+            return None
+        if row["request_fingerprint"] != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+        if row["status"] == "completed":
+            return row
+        if row["locked_until"] is None or row["locked_until"] < datetime.utcnow():
+            # Owner is gone: let the caller take the key over
+            return None
+        if loop.time() >= deadline:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+        await asyncio.sleep(settings.IDEMPOTENCY_POLL_INTERVAL_SECONDS)
+
+
+async def _run_and_store(key: str, user_id: str, owner_token: str, handler, status_code: int) -> Response:
+    event = asyncio.Event()
+    _inflight[(user_id, key)] = event
+    table = models.IdempotencyKey
+    # Only touch the row while we still own it (a stalled owner may have been taken over)
+    owned = (table.user_id == user_id, table.key == key, table.owner_token == owner_token)
+    lease = asyncio.create_task(_renew_lease(key, user_id, owner_token))
+    try:
+        body = await handler()
+        await database.execute(
+            update(table)
+            .where(*owned)
+            .values(status="completed", response_status=status_code, response_body=body.decode())
+        )
+        return Response(content=body, status_code=status_code, media_type="application/json")
+    except BaseException:
+        # Failed requests are not cached: release the key so a retry runs again
+        await database.execute(delete(table).where(*owned))
+        raise
+    finally:
+        lease.cancel()
+        _inflight.pop((user_id, key), None)
+        event.set()
+
+
+async def idempotent_response(key: str, user_id: str, payload: dict, handler, status_code: int = 200) -> Response:
+    """Run handler (returning the encoded JSON body) at most once per user and
+    Idempotency-Key and replay its stored response to retries"""
+    fingerprint = request_fingerprint(payload)
+    while True:
+        owner_token = await _claim_key(key, user_id, fingerprint)
+        if owner_token:
+            return await _run_and_store(key, user_id, owner_token, handler, status_code)
+        row = await _wait_for_key(key, user_id, fingerprint)
+        if row is not None:
+            return _stored_response(row)
+
+
+async def sweep_expired_keys() -> int:
+    """Bulk-delete expired keys, returns the number of rows removed"""
+    table = models.IdempotencyKey
+    async with engine.begin() as conn:
+        result = await conn.execute(delete(table).where(table.expires_at < datetime.utcnow()))
+        return result.rowcount
+
+
+async def sweep_expired_keys_forever():
+    while True:
+        try:
+            removed = await sweep_expired_keys()
+            if removed:
+                print(f"Swept {removed} expired idempotency keys")
+        except Exception as e:
+            print(f"Idempotency sweep error: {e}")
+        await asyncio.sleep(settings.IDEMPOTENCY_SWEEP_INTERVAL_SECONDS)
@@ -0,0 +1,151 @@
+import asyncio
+import random
+import time
+from collections import defaultdict, deque
+
+from langchain_core.exceptions import OutputParserException
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.services.admission import llm_admission
+from app.services.ai_plan import run_chain
+
+LATENCY_WINDOW = 500
+
+# Keep references to fire-and-forget shadow calls so they are not garbage collected
+_shadow_tasks = set()
+
+
+def request_features(duration_days, difficulty, description) -> dict:
+    return {
+        "duration_days": int(duration_days or 0),
+        "difficulty": getattr(difficulty, "value", difficulty),
+        "description_chars": len(description or ""),
+    }
+
+
+def rule_matches(rule: dict, features: dict) -> bool:
+    if "min_duration_days" in rule and features["duration_days"] < rule["min_duration_days"]:
+        return False
+    if "max_duration_days" in rule and features["duration_days"] > rule["max_duration_days"]:
+        return False
+    if "difficulty" in rule and features["difficulty"] not in rule["difficulty"]:
+        return False
+    if "min_description_chars" in rule and features["description_chars"] < rule["min_description_chars"]:
+        return False
+    return True
+
+
+def choose_tier(features: dict, rules: list = None) -> str:
+    """Pick a backend tier from request features; first matching rule wins"""
+    for rule in settings.LLM_ROUTING_RULES if rules is None else rules:
+        if rule_matches(rule, features):
+            return rule["tier"]
+    return settings.LLM_DEFAULT_TIER
+
+
+# ✅ PER-TIER METRICS
+class TierStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.parse_failures = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, latency: float, outcome: str):
+        self.calls += 1
+        self.latencies.append(latency)
+        if outcome == "parse_failure":
+            self.parse_failures += 1
+        elif outcome == "error":
+            self.errors += 1
+
+    def summary(self) -> dict:
+        ordered = sorted(self.latencies)
+        percentile = lambda p: round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3) if ordered else None
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "parse_failures": self.parse_failures,
+            "parse_failure_rate": round(self.parse_failures / self.calls, 4) if self.calls else 0.0,
+            "latency_p50": percentile(0.50),
+            "latency_p95": percentile(0.95),
+        }
+
+
+# stats[tier]["primary" | "shadow"]
+stats = defaultdict(lambda: {"primary": TierStats(), "shadow": TierStats()})
+shadow_comparisons = deque(maxlen=100)
+
+
+def routing_stats() -> dict:
+    return {
+        "tiers": {tier: {role: s.summary() for role, s in roles.items()} for tier, roles in stats.items()},
+        "shadow_comparisons": list(shadow_comparisons),
+    }
+
+
+def _plan_size(result) -> dict:
+    return {key: len(value) for key, value in (result or {}).items() if isinstance(value, list)}
+
+
+async def _timed_run(name: str, variables: dict, tier: str, role: str):
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        return await run_chain(name, variables, tier=tier)
+    except (OutputParserException, ValidationError):
+        outcome = "parse_failure"
+        raise
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        stats[tier][role].record(time.perf_counter() - start, outcome)
+
+
+async def _run_shadow(name: str, variables: dict, primary_tier: str, shadow_tier: str, primary_task):
+    # Shadow traffic only uses a spare slot under LLM_MAX_CONCURRENCY and never queues
+    if not await llm_admission.limiter.try_acquire():
+        return
+    shadow_result, shadow_ok = None, True
+    try:
+        shadow_result = await _timed_run(name, variables, shadow_tier, "shadow")
+    except Exception as e:
+        shadow_ok = False
+        print(f"Shadow tier {shadow_tier} failed: {e}")
+    finally:
+        llm_admission.limiter.release()
+
+    primary_result, primary_ok = None, True
+    try:
+        primary_result = await primary_task
+    except Exception:
+        primary_ok = False
+
+    shadow_comparisons.append({
+        "prompt": name,
+        "primary_tier": primary_tier,
+        "shadow_tier": shadow_tier,
+        "primary_ok": primary_ok,
+        "shadow_ok": shadow_ok,
+        "primary_size": _plan_size(primary_result),
+        "shadow_size": _plan_size(shadow_result),
+    })
+
+
+def _maybe_shadow(name: str, variables: dict, tier: str, primary_task):
+    shadow_tier = settings.LLM_SHADOW_TIER
+    if not shadow_tier or shadow_tier == tier or random.random() >= settings.LLM_SHADOW_SAMPLE_RATE:
+        return
+    task = asyncio.create_task(_run_shadow(name, variables, tier, shadow_tier, primary_task))
+    _shadow_tasks.add(task)
+    task.add_done_callback(_shadow_tasks.discard)
+
+
+async def run_routed_chain(name: str, variables: dict, features: dict) -> dict:
+    """Run a prompt on the tier chosen for these features, recording latency and parse failures"""
+    tier = choose_tier(features)
+    primary_task = asyncio.ensure_future(_timed_run(name, variables, tier, "primary"))
+    _maybe_shadow(name, variables, tier, primary_task)
+    return await primary_task
@@ -0,0 +1,118 @@
+import json
+import re
+
+from fastapi import HTTPException
+
+from app.schema.goal import RegenerateScope
+
+WEEK_PATTERN = re.compile(r"week\s*(\d+)", re.IGNORECASE)
+MAX_CONTEXT_TOPICS = 30
+
+
+def week_of(item: dict):
+    """Week number of a weekly_schedule item ("Week 3 - Monday" -> 3), or None"""
+    match = WEEK_PATTERN.search(item.get("day", ""))
+    return int(match.group(1)) if match else None
+
+
+def _compact(value) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _topics(items) -> str:
+    seen = []
+    for item in items:
+        for topic in item.get("topics", []):
+            if topic not in seen:
+                seen.append(topic)
+    return ", ".join(seen[:MAX_CONTEXT_TOPICS]) or "none"
+
+
+def _milestone_lines(milestones) -> str:
+    return "\n".join(f"- Week {m['week']}: {m['goal']}" for m in milestones) or "none"
+
+
+def build_section_request(plan: dict, scope: RegenerateScope, week_start: int = None, week_end: int = None) -> dict:
+    """Prompt variables for one section: the slice itself plus a compact summary of the rest"""
+    schedule = plan["weekly_schedule"]
+
+    if scope == RegenerateScope.weeks:
+        selected = [item for item in schedule if week_start <= (week_of(item) or 0) <= week_end]
+        before = [item for item in schedule if week_of(item) == week_start - 1]
+        after = [item for item in schedule if week_of(item) == week_end + 1]
+        context = (
+            f"Milestones:\n{_milestone_lines(plan['milestones'])}\n"
+            f"Week {week_start - 1} topics: {_topics(before)}\n"
+            f"Week {week_end + 1} topics: {_topics(after)}"
+        )
+        return {
+            "section": "weekly schedule",
+            "current": _compact(selected),
+            "context": context,
+            "section_rules": (
+                f"Cover weeks {week_start} to {week_end} only and label each day like "
+                f"\"Week {week_start} - Monday\"."
+            ),
+        }
+
+    if scope == RegenerateScope.resources:
+        return {
+            "section": "resources",
+            "current": _compact(plan["resources"]),
+            "context": f"Topics covered: {_topics(schedule)}",
+            "section_rules": "Match the topics above and use real URLs when possible.",
+        }
+
+    weeks = [week_of(item) for item in schedule if week_of(item)]
+    return {
+        "section": "milestones",
+        "current": _compact(plan["milestones"]),
+        "context": f"Topics covered: {_topics(schedule)}\nWeeks in plan: {max(weeks) if weeks else 'unknown'}",
+        "section_rules": "Milestones must be progressive and ordered by week.",
+    }
+
+
+def missing_weeks(items, week_start: int, week_end: int) -> list:
+    """Weeks in the range that have no weekly_schedule item"""
+    covered = {week_of(item) for item in items}
+    return [week for week in range(week_start, week_end + 1) if week not in covered]
+
+
+def check_section(scope: RegenerateScope, section: dict, week_start: int = None, week_end: int = None):
+    """Reject a regenerated section that would drop content from the stored plan (502)"""
+    if scope == RegenerateScope.weeks:
+        missing = missing_weeks(section["weekly_schedule"], week_start, week_end)
+        if missing:
+            raise HTTPException(
+                status_code=502,
+                detail=f"Regenerated schedule did not cover week(s) {', '.join(map(str, missing))}; plan left unchanged"
+            )
+    elif not section[scope.value]:
+        raise HTTPException(status_code=502, detail=f"Regenerated {scope.value} were empty; plan left unchanged")
+
+
+def merge_section(plan: dict, scope: RegenerateScope, section: dict, week_start: int = None, week_end: int = None) -> dict:
+    """Merge a regenerated section into the plan, leaving everything else untouched.
+
+    The section must have passed check_section, so every replaced week has new items.
+    """
+    merged = dict(plan)
+
+    if scope == RegenerateScope.weeks:
+        in_range = lambda item: week_start <= (week_of(item) or 0) <= week_end
+        # Stable sort keeps the model's day order inside each week
+        new_items = sorted((item for item in section["weekly_schedule"] if in_range(item)), key=week_of)
+        schedule = plan["weekly_schedule"]
+        # Splice the new weeks in where the replaced range was; everything else,
+        # including items without a week label, keeps its position
+        replaced = [i for i, item in enumerate(schedule) if in_range(item)]
+        at = replaced[0] if replaced else len(schedule)
+        kept_before = [item for item in schedule[:at] if not in_range(item)]
+        kept_after = [item for item in schedule[at:] if not in_range(item)]
+        merged["weekly_schedule"] = kept_before + new_items + kept_after
+    elif scope == RegenerateScope.resources:
+        merged["resources"] = section["resources"]
+    else:
+        merged["milestones"] = sorted(section["milestones"], key=lambda m: m["week"])
+
+    return merged
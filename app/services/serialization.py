@@ -0,0 +1,66 @@
+import orjson
+from fastapi import Response
+from pydantic import ValidationError
+
+from app.schema.goal import Goal, MilestoneItem, ResourceItem, WeeklyScheduleItem
+
+# Invariant: plan columns only ever hold normalize_plan_items() output written with
+# dump_plan_column(). Goal creation and regeneration validate through the plan schemas,
+# the bulk import normalizes every line, and migration a4c8e1f7b250 rewrote older rows.
+PLAN_COLUMNS = ("weekly_schedule", "resources", "milestones")
+PLAN_ITEM_MODELS = {
+    "weekly_schedule": WeeklyScheduleItem,
+    "resources": ResourceItem,
+    "milestones": MilestoneItem,
+}
+
+# Same key order as the Goal schema, so the payload is identical to response_model output
+GOAL_FIELDS = tuple(Goal.model_fields)
+
+
+def dump_plan_column(items: list) -> str:
+    """Canonical JSON stored in a plan column; read paths embed it without re-parsing"""
+    return orjson.dumps(items).decode()
+
+
+def normalize_plan_items(column: str, items) -> list:
+    """Validate plan items against the Goal schema: defaults filled in, unknown keys dropped.
+
+    Items that do not validate are skipped, since no Goal response can carry them.
+    """
+    model = PLAN_ITEM_MODELS[column]
+    valid = []
+    for item in items if isinstance(items, list) else []:
+        try:
+            valid.append(model.model_validate(item).model_dump(mode="json"))
+        except ValidationError:
+            continue
+    return valid
+
+
+def goal_document(row) -> dict:
+    """Map a goals row mapping (or dict of the same columns) to the Goal response shape.
+
+    Plan columns are validated once, when written (see the invariant above), so
+    this only picks and defaults fields and embeds them via orjson.Fragment.
+    """
+    doc = {field: row.get(field) for field in GOAL_FIELDS}
+    for column in PLAN_COLUMNS:
+        doc[column] = orjson.Fragment(doc[column]) if doc[column] else []
+    doc["user_id"] = str(doc["user_id"])
+    doc["progress"] = doc["progress"] or 0.0
+    doc["completed"] = bool(doc["completed"])
+    return doc
+
+
+def encode_goals(rows) -> bytes:
+    return orjson.dumps([goal_document(row._mapping) for row in rows])
+
+
+def encode_goal(row) -> bytes:
+    return orjson.dumps(goal_document(row))
+
+
+def json_response(body: bytes, status_code: int = 200) -> Response:
+    """Send pre-encoded JSON as-is, skipping response_model re-validation"""
+    return Response(content=body, status_code=status_code, media_type="application/json")
@@ -18,7 +18,7 @@ function App() {
   /* useEffect(() => {
     const token = localStorage.getItem('token');
     if (token) {
-      fetch('http://127.0.0.1:8000/users/notifications', {
+      fetch('/users/notifications', {
         method: 'GET',
         headers: {
           'Authorization': `Bearer ${token}`,
@@ -0,0 +1,3 @@
+// Base URL of the API. Empty means same origin: the production build is served by FastAPI.
+// `npm start` sets it in .env.development so the dev server on :3000 still reaches :8000.
+export const API_URL = process.env.REACT_APP_API_URL || '';
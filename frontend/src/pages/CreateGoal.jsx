@@ -1,5 +1,6 @@
 import React, { useState } from "react";
 import { useNavigate } from "react-router-dom";
+import { API_URL } from "../api";
 
 const CreateGoal = () => {
   const navigate = useNavigate();
@@ -33,7 +34,7 @@ const CreateGoal = () => {
   const generateAIPlan = async () => {
     setLoading(true);
     try {
-      const response = await fetch('http://127.0.0.1:8000/goals/ai-plan', {
+      const response = await fetch(`${API_URL}/goals/ai-plan`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
@@ -81,7 +82,7 @@ const CreateGoal = () => {
         user_id: localStorage.getItem('token'),
       };
 
-      const response = await fetch('http://127.0.0.1:8000/goals/', {
+      const response = await fetch(`${API_URL}/goals/`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(finalData),
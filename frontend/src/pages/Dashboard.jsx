@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
+import { API_URL } from '../api';
 
 const Dashboard = ({ unreadCount, showNotifications, toggleNotifications }) => {
   const [goals, setGoals] = useState([]);
@@ -17,7 +18,7 @@ const Dashboard = ({ unreadCount, showNotifications, toggleNotifications }) => {
       setLoading(true);
       try {
         const token = localStorage.getItem('token');
-        const response = await fetch(`http://127.0.0.1:8000/goals/?user_id=${token}`);
+        const response = await fetch(`${API_URL}/goals/?user_id=${token}`);
         
         if (response.ok) {
           const realGoals = await response.json();
@@ -1,5 +1,6 @@
 import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
+import { API_URL } from '../api';
 
 const Login = () => {
   const [email, setEmail] = useState('');
@@ -11,7 +12,7 @@ const Login = () => {
     e.preventDefault();
     setError(''); // Clear previous error on new attempt
     try {
-      const response = await fetch('http://127.0.0.1:8000/users/login', {
+      const response = await fetch(`${API_URL}/users/login`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -76,7 +77,7 @@ const Login = () => {
         type="button"
         className="btn-google btn-large"
         onClick={() => {
-          window.location.href = "http://127.0.0.1:8000/auth/google/login";
+          window.location.href = `${API_URL}/auth/google/login`;
         }}
       >
         Google